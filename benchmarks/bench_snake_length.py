@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Snake length benchmark
+Times SnakeEngine.step() with snakes of increasing length on a large board,
+to check that tick cost does not grow with the snake.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_engine import SnakeEngine, UP
+
+BOARD_SIZE = 256
+LENGTHS = (10, 100, 1000, 5000, 20000)
+TICKS_PER_ROUND = 100
+ROUNDS = 20
+
+
+def serpentine(length, width, height):
+    """Body cells filling rows from the bottom, head first, head in the top row"""
+    cells = []
+    for i in range(length):
+        row, col = divmod(i, width)
+        x = col if row % 2 == 0 else width - 1 - col
+        cells.append((x, height - 1 - row))
+    cells.reverse()
+    return cells
+
+
+def time_length(length):
+    """Average microseconds per tick for a snake of the given length"""
+    engine = SnakeEngine(BOARD_SIZE, BOARD_SIZE)
+    body = serpentine(length, BOARD_SIZE, BOARD_SIZE)
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        engine.place_snake(body)
+        engine.generate_eggs()
+        engine.check_free_cells()
+        engine.direction = UP
+        engine.time_remaining = float('inf')
+        engine.lives = 10 ** 9
+
+        start = time.perf_counter()
+        for _ in range(TICKS_PER_ROUND):
+            engine.step()
+        elapsed += time.perf_counter() - start
+    return elapsed / (ROUNDS * TICKS_PER_ROUND) * 1e6
+
+
+def main():
+    print(f"Board {BOARD_SIZE}x{BOARD_SIZE}, {ROUNDS * TICKS_PER_ROUND} ticks per length")
+    for length in LENGTHS:
+        print(f"  length {length:>6}: {time_length(length):6.2f} us/tick")
+
+
+if __name__ == "__main__":
+    main()
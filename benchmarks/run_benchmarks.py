@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Math Snake benchmark suite
+Times update(), draw() (also on a large scrolling board), generate_equation(),
+generate_eggs() and state snapshots under the SDL dummy video/audio drivers and writes the
+results as JSON, so runs from different commits can be compared.
+
+    python benchmarks/run_benchmarks.py --output new.json
+    python benchmarks/run_benchmarks.py --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Headless drivers must be chosen before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from bench_snake_length import serpentine
+from math_snake_pygame import MathSnakeGame, GRID_WIDTH, GRID_HEIGHT
+from snake_engine import SnakeEngine, UP
+from snake_snapshot import SnapshotCodec
+
+SNAKE_LENGTHS = (1, 60, 300)
+EQUATION_LEVELS = range(6)
+EGG_GRIDS = ((30, 20), (100, 100), (300, 300))
+EGG_FILL = (0.0, 0.5)          # Fraction of the board covered by snake
+EGG_LEVELS = (0, 10, 30)       # Decoy count is 6 + level
+BIG_BOARD = (1000, 1000)       # Drawn through the camera; cost should match the normal board
+BIG_SNAKE_LENGTHS = (60, 200000)
+SNAPSHOT_LENGTHS = (1, 300)
+
+# Regressions smaller than this fraction are treated as noise by --compare
+DEFAULT_THRESHOLD = 0.10
+
+
+def measure(run, setup=None, number=100, repeat=7):
+    """Time run() number times per repeat, calling setup() before each repeat.
+
+    Returns microseconds per call as median and best over the repeats.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {"median_us": statistics.median(samples), "min_us": min(samples), "calls": number * repeat}
+
+
+def prepare_moving_snake(game, length):
+    """Lay a snake of the given length along the bottom rows, heading up into free rows"""
+    game.reset_game(seed=1)
+    game.place_snake(serpentine(length, game.width, game.height))
+    game.generate_eggs()
+    game.check_free_cells()
+    game.direction = UP
+    game.time_remaining = 10 ** 6
+    game.lives = 10 ** 9
+
+
+def bench_update(game, results, scale):
+    for length in SNAKE_LENGTHS:
+        free_rows = game.height - (length + game.width - 1) // game.width - 1
+        results[f"update/snake={length}"] = measure(
+            game.update, setup=lambda: prepare_moving_snake(game, length),
+            number=max(1, free_rows), repeat=20 * scale)
+
+
+def bench_draw(game, results, scale):
+    for length in SNAKE_LENGTHS:
+        free_rows = game.height - (length + game.width - 1) // game.width - 1
+
+        game.dirty_rendering = False
+        prepare_moving_snake(game, length)
+        results[f"draw/full/snake={length}"] = measure(game.draw, number=20, repeat=5 * scale)
+
+        # Dirty mode: one logic tick per frame so each frame has real changes
+        game.dirty_rendering = True
+
+        def frame():
+            game.update()
+            game.draw()
+
+        def setup():
+            prepare_moving_snake(game, length)
+            game.drawn_state = None  # The snake was replaced; start from a full repaint
+            game.draw()
+
+        results[f"draw/dirty/snake={length}"] = measure(
+            frame, setup=setup, number=max(1, free_rows), repeat=20 * scale)
+        game.dirty_rendering = False
+
+
+def bench_big_board(results, scale):
+    game = MathSnakeGame(seed=1, sound=False, board_size=BIG_BOARD)
+    for length in BIG_SNAKE_LENGTHS:
+        game.place_snake(serpentine(length, game.width, game.height))
+        game.generate_eggs()
+        game.check_free_cells()
+        results[f"draw/full/board={BIG_BOARD[0]}x{BIG_BOARD[1]}/snake={length}"] = measure(
+            game.draw, number=20, repeat=5 * scale)
+
+
+def bench_equations(results, scale):
+    engine = SnakeEngine(seed=1)
+    for level in EQUATION_LEVELS:
+        engine.level = level
+        results[f"generate_equation/level={level}"] = measure(
+            engine.generate_equation, number=1000, repeat=5 * scale)
+
+
+def bench_eggs(results, scale):
+    for width, height in EGG_GRIDS:
+        engine = SnakeEngine(width, height, seed=1)
+        for fill in EGG_FILL:
+            engine.place_snake(serpentine(max(1, int(width * height * fill)), width, height))
+            for level in EGG_LEVELS:
+                engine.level = level
+                results[f"generate_eggs/grid={width}x{height}/fill={fill}/decoys={6 + level}"] = measure(
+                    engine.generate_eggs, number=200, repeat=5 * scale)
+                engine.check_free_cells()
+
+
+def bench_snapshots(results, scale):
+    engine = SnakeEngine(seed=1)
+    restored = SnakeEngine(seed=2)
+    codec = SnapshotCodec()
+    buffer = bytearray(16384)
+    for length in SNAPSHOT_LENGTHS:
+        engine.place_snake(serpentine(length, engine.width, engine.height))
+        engine.generate_eggs()
+        engine.check_free_cells()
+        for exact in (False, True):
+            kind = "exact" if exact else "state"
+            results[f"snapshot/pack/{kind}/snake={length}"] = measure(
+                lambda: codec.pack_into(engine, buffer, 0, exact), number=500, repeat=5 * scale)
+            data = codec.encode(engine, exact)
+            results[f"snapshot/restore/{kind}/snake={length}"] = measure(
+                lambda: codec.restore(restored, data), number=200, repeat=5 * scale)
+
+
+def run_all(scale):
+    results = {}
+    game = MathSnakeGame(seed=1)
+    bench_update(game, results, scale)
+    bench_draw(game, results, scale)
+    bench_big_board(results, scale)
+    bench_equations(results, scale)
+    bench_eggs(results, scale)
+    bench_snapshots(results, scale)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "grid": [GRID_WIDTH, GRID_HEIGHT],
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print per-benchmark changes; returns the names that got slower than threshold"""
+    regressions = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"  {name:<55} {result['median_us']:>10.2f} us  (new)")
+            continue
+        change = result["median_us"] / old["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<55} {old['median_us']:>10.2f} -> {result['median_us']:>10.2f} us  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Snake benchmark suite")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a previous JSON run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown fraction reported as a regression (default 0.10)")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, for smoke runs")
+    args = parser.parse_args()
+
+    report = run_all(scale=1 if args.quick else 3)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    for name, result in report["results"].items():
+        print(f"  {name:<55} {result['median_us']:>10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Math Snake equation bank
+Every equation each level can produce, enumerated once with the probability
+the level rules give it, cached on disk and sampled in O(1) with Walker's
+alias method.
+"""
+
+import struct
+from array import array
+from collections import deque
+from itertools import product
+
+from snake_cache import cache_path, write_atomic
+
+BANK_VERSION = 1
+MAGIC = b'MSEB'
+HEADER = struct.Struct('<4sHB')
+LEVEL_HEADER = struct.Struct('<IB')
+
+# Levels from 5 up share the hardest rules
+MAX_COMPLEXITY = 5
+
+OPERATIONS = ('+', '-', '*', '/')
+
+# Sampling avoids repeating any of the last few equations of a level
+REPEAT_WINDOW = 8
+REPEAT_RETRIES = 4
+
+
+def complexity(level):
+    """Rule set used by a level"""
+    return min(level, MAX_COMPLEXITY)
+
+
+def enumerate_level(level):
+    """Yield (numbers, operation index, probability) for every equation a level can produce.
+
+    The probabilities follow the level rules: the operation is picked
+    uniformly, then each number uniformly from its range.
+    """
+    if level == 0:
+        # Simple addition/subtraction (single operation)
+        for num1, num2 in product(range(1, 11), range(1, 11)):
+            yield (num1, num2), 0, 1 / 2 / 10 / 10
+        for num1 in range(10, 21):
+            for num2 in range(1, num1):
+                yield (num1, num2), 1, 1 / 2 / 11 / (num1 - 1)
+
+    elif level == 1:
+        # All four operations
+        for num1, num2 in product(range(5, 16), range(5, 16)):
+            yield (num1, num2), 0, 1 / 4 / 11 / 11
+        for num1 in range(15, 26):
+            for num2 in range(1, num1):
+                yield (num1, num2), 1, 1 / 4 / 11 / (num1 - 1)
+        for num1, num2 in product(range(2, 9), range(2, 9)):
+            yield (num1, num2), 2, 1 / 4 / 7 / 7
+        for answer, num2 in product(range(2, 13), range(2, 7)):
+            yield (answer * num2, num2), 3, 1 / 4 / 11 / 5
+
+    elif level == 2:
+        # a + b - c
+        for num1, num2 in product(range(10, 21), range(1, 11)):
+            top = min(10, num1 + num2 - 1)
+            for num3 in range(1, top + 1):
+                yield (num1, num2, num3), 0, 1 / 11 / 10 / top
+
+    elif level == 3:
+        # a × b + c - d
+        for numbers in product(range(2, 6), range(2, 6), range(5, 16), range(1, 11)):
+            yield numbers, 0, 1 / 4 / 4 / 11 / 10
+
+    elif level == 4:
+        # a × b ÷ c + d, with b a multiple of c
+        for num3, num1, factor, num4 in product(range(2, 5), range(2, 7), range(2, 5), range(1, 11)):
+            yield (num1, num3 * factor, num3, num4), 0, 1 / 3 / 5 / 3 / 10
+
+    else:
+        # a + b × c - d ÷ e, with d a multiple of e
+        for num1, num2, num3, num5, factor in product(range(5, 16), range(2, 6), range(2, 6),
+                                                      range(2, 5), range(2, 7)):
+            yield (num1, num2, num3, num5 * factor, num5), 0, 1 / 11 / 4 / 4 / 3 / 5
+
+
+def make_equation(level, numbers, operation):
+    """Equation dict in the shape SnakeEngine uses"""
+    numbers = list(numbers)
+    if level <= 1:
+        num1, num2 = numbers
+        op = OPERATIONS[operation]
+        answer = {'+': num1 + num2, '-': num1 - num2, '*': num1 * num2, '/': num1 // num2}[op]
+        return {'equation': f"{num1} {op} {num2} = ?", 'answer': answer,
+                'numbers': numbers, 'operations': [op]}
+    if level == 2:
+        num1, num2, num3 = numbers
+        return {'equation': f"{num1} + {num2} - {num3} = ?", 'answer': num1 + num2 - num3,
+                'numbers': numbers, 'operations': ['+', '-']}
+    if level == 3:
+        num1, num2, num3, num4 = numbers
+        return {'equation': f"{num1} × {num2} + {num3} - {num4} = ?", 'answer': num1 * num2 + num3 - num4,
+                'numbers': numbers, 'operations': ['*', '+', '-']}
+    if level == 4:
+        num1, num2, num3, num4 = numbers
+        return {'equation': f"{num1} × {num2} ÷ {num3} + {num4} = ?", 'answer': (num1 * num2) // num3 + num4,
+                'numbers': numbers, 'operations': ['*', '/', '+']}
+    num1, num2, num3, num4, num5 = numbers
+    return {'equation': f"{num1} + {num2} × {num3} - {num4} ÷ {num5} = ?",
+            'answer': num1 + (num2 * num3) - (num4 // num5),
+            'numbers': numbers, 'operations': ['+', '*', '-', '/']}
+
+
+def alias_table(probabilities):
+    """Walker/Vose alias table: returns (acceptance probabilities, aliases)"""
+    count = len(probabilities)
+    total = sum(probabilities)
+    scaled = [p * count / total for p in probabilities]
+    accept = array('d', [1.0]) * count
+    alias = array('i', range(count))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        accept[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1.0 - scaled[less]
+        (small if scaled[more] < 1.0 else large).append(more)
+    return accept, alias
+
+
+class LevelTable:
+    """All equations of one level as flat arrays"""
+
+    def __init__(self, level, width, numbers, operations, accept, alias):
+        self.level = level
+        self.width = width              # Numbers per equation
+        self.numbers = numbers          # array('h'), width entries per equation
+        self.operations = operations    # array('B'), operation index per equation
+        self.accept = accept            # array('d'), alias acceptance probability
+        self.alias = alias              # array('i')
+        self.equations = {}             # Equation dicts built so far, by index
+
+    def __len__(self):
+        return len(self.operations)
+
+    def sample(self, rng):
+        """Index of a random equation, weighted like the level rules"""
+        i = int(rng.random() * len(self.operations))
+        if rng.random() >= self.accept[i]:
+            i = self.alias[i]
+        return i
+
+    def equation(self, index):
+        """Equation dict for an index; callers must not modify it"""
+        equation = self.equations.get(index)
+        if equation is None:
+            start = index * self.width
+            numbers = self.numbers[start:start + self.width]
+            equation = make_equation(self.level, numbers, self.operations[index])
+            self.equations[index] = equation
+        return equation
+
+    @classmethod
+    def build(cls, level):
+        numbers = array('h')
+        operations = array('B')
+        probabilities = []
+        width = 0
+        for values, operation, probability in enumerate_level(level):
+            width = len(values)
+            numbers.extend(values)
+            operations.append(operation)
+            probabilities.append(probability)
+        accept, alias = alias_table(probabilities)
+        return cls(level, width, numbers, operations, accept, alias)
+
+
+class EquationBank:
+    """Equation tables for every rule set, indexed by complexity"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, level):
+        return self.tables[complexity(level)]
+
+    def sample(self, level, rng):
+        """Random equation dict for a level"""
+        table = self.table(level)
+        return table.equation(table.sample(rng))
+
+    def sample_indices(self, level, count, np_rng):
+        """Vectorized sampling of many equation indices with a NumPy Generator"""
+        import numpy as np
+        table = self.table(level)
+        i = np_rng.integers(0, len(table), size=count)
+        reject = np_rng.random(count) >= np.frombuffer(table.accept, dtype=np.float64)[i]
+        i[reject] = np.frombuffer(table.alias, dtype=np.int32)[i[reject]]
+        return i
+
+    @classmethod
+    def build(cls):
+        return cls([LevelTable.build(level) for level in range(MAX_COMPLEXITY + 1)])
+
+    def to_bytes(self):
+        parts = [HEADER.pack(MAGIC, BANK_VERSION, len(self.tables))]
+        for table in self.tables:
+            parts.append(LEVEL_HEADER.pack(len(table), table.width))
+            for values in (table.numbers, table.operations, table.accept, table.alias):
+                parts.append(values.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, levels = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != BANK_VERSION:
+            raise ValueError("equation bank cache is from another version")
+        offset = HEADER.size
+        tables = []
+        for level in range(levels):
+            count, width = LEVEL_HEADER.unpack_from(data, offset)
+            offset += LEVEL_HEADER.size
+            fields = []
+            for typecode, length in (('h', count * width), ('B', count), ('d', count), ('i', count)):
+                values = array(typecode)
+                size = values.itemsize * length
+                values.frombytes(data[offset:offset + size])
+                offset += size
+                fields.append(values)
+            tables.append(LevelTable(level, width, *fields))
+        return cls(tables)
+
+
+class EquationSampler:
+    """Draws equations for one game, skipping ones seen in the last REPEAT_WINDOW draws of a level"""
+
+    def __init__(self, bank, rng, window=REPEAT_WINDOW):
+        self.bank = bank
+        self.rng = rng
+        self.recent = {}
+        self.window = window
+        self.last = None   # (table level, index) of the latest draw, for snapshots
+
+    def sample(self, level):
+        table = self.bank.table(level)
+        recent = self.recent.get(table.level)
+        if recent is None:
+            recent = self.recent[table.level] = deque(maxlen=self.window)
+
+        # A few retries keep this O(1); a repeat is allowed if they all hit the window
+        for _ in range(REPEAT_RETRIES):
+            index = table.sample(self.rng)
+            if index not in recent:
+                break
+        recent.append(index)
+        self.last = (table.level, index)
+        return table.equation(index)
+
+
+_bank = None
+
+
+def load_bank():
+    """The process-wide equation bank, read from the cache or built and cached on first use"""
+    global _bank
+    if _bank is not None:
+        return _bank
+
+    name = f"equations-v{BANK_VERSION}.bin"
+    try:
+        with open(cache_path(name), 'rb') as f:
+            _bank = EquationBank.from_bytes(f.read())
+    except (OSError, ValueError, struct.error):
+        _bank = EquationBank.build()
+        try:
+            write_atomic(cache_path(name), _bank.to_bytes())
+        except OSError:
+            pass  # Read-only home or no cache directory: keep the bank in memory only
+    return _bank
@@ -1,11 +1,19 @@
+import itertools
 import pygame
-import random
 import sys
-import math
+import time
+from collections import deque
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+from snake_engine import (
+    SnakeEngine, UP, DOWN, LEFT, RIGHT, STOP,
+    EVENT_TARGET, EVENT_DECOY, EVENT_GAME_OVER,
+)
+from snake_leaderboard import ALL, by_level, by_player
+from snake_profiler import InputLatency
+from snake_render import BoardSprites, TextCache
+from snake_snapshot import save_game, load_game, discard_game
+from snake_sounds import SoundBank
+from snake_timing import FixedTimestep
 
 # Constants
 WINDOW_WIDTH = 800
@@ -16,6 +24,29 @@ GRID_SIZE = 20
 GRID_WIDTH = GAME_WIDTH // GRID_SIZE
 GRID_HEIGHT = GAME_HEIGHT // GRID_SIZE
 
+# The game area shows this many cells; bigger boards scroll under a camera
+VIEW_WIDTH = GRID_WIDTH
+VIEW_HEIGHT = GRID_HEIGHT
+
+# The camera moves once the head comes this close to the edge of the view
+CAMERA_MARGIN = 6
+
+# Dirty-rectangle mode repaints everything if the snake moved more than this between frames
+MAX_TRACKED_MOVES = 16
+
+# Turns pressed faster than the snake moves wait here, one applied per logic tick
+INPUT_QUEUE_SIZE = 3
+
+# While idle (paused, game over, waiting for the first key) the loop blocks on
+# input for up to this long before checking for changes to draw
+IDLE_TIMEOUT_MS = 250
+
+# Rows per list on the game over leaderboard
+LEADERBOARD_ROWS = 5
+
+# Egg numbers pre-rendered into the sprite atlas (larger ones are added on first use)
+MAX_EGG_SPRITE = 99
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -28,254 +59,92 @@ GRAY = (149, 165, 166)
 DARK_GRAY = (44, 62, 80)
 LIGHT_GRAY = (236, 240, 241)
 
-class MathSnakeGame:
-    def __init__(self):
+class MathSnakeGame(SnakeEngine):
+    def __init__(self, dirty_rendering=False, fps_limit=60, interpolate=False, tick_rates=None,
+                 seed=None, recorder=None, profiler=None, trace_path=None, sound=True, autoplayer=None,
+                 board_size=(GRID_WIDTH, GRID_HEIGHT), resume=False, leaderboard=None, telemetry=None):
+        # Replay logs start games from their seed, which a resumed game doesn't
+        if resume and recorder is not None:
+            raise ValueError("a resumed game can't be recorded")
+        self.init_pygame(sound)
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Math Snake Game")
         self.clock = pygame.time.Clock()
         
+        # Rendering: static layers are prebaked once; in dirty-rectangle mode
+        # only changed areas are repainted and pushed to the display
+        self.build_layers(board_size)
+        self.dirty_rendering = dirty_rendering
+        self.drawn_state = None
+        
+        # Frame pacing: fps_limit=0 renders uncapped (benchmark mode); logic
+        # runs on its own fixed timestep, see run(). Interpolation only
+        # applies to full-frame rendering.
+        self.fps_limit = fps_limit
+        self.interpolate = interpolate
+        self.render_alpha = 0.0
+        self.scheduler = FixedTimestep()
+        self.idle_redraw = True  # Draw on the next idle frame (set by every active frame)
+        self.idle_drawn = None   # idle_key() when an idle frame last drew
+        self.idle_frames = 0
+        
+        # Input source: the keyboard, or an agent with act(engine) -> direction
+        # (e.g. snake_autoplay.PathAgent) that steers every logic tick.
+        # Key presses queue as (direction, press time) and each tick takes one.
+        self.autoplayer = autoplayer
+        self.input_queue = deque()
+        self.input_latency = InputLatency()
+        
+        # Optional snake_leaderboard.Leaderboard: finished games are recorded
+        # and the game over screen shows the top scores from its cache
+        self.leaderboard = leaderboard
+        self.final_entry = None   # Leaderboard entry of the last finished game
+        
+        # Optional snake_telemetry.Telemetry: every tick's events are recorded
+        self.telemetry = telemetry
+        
+        # Optional frame profiler (F3 toggles its overlay)
+        self.profiler = profiler
+        self.trace_path = trace_path
+        
         # Fonts
         self.font_large = pygame.font.Font(None, 36)
         self.font_medium = pygame.font.Font(None, 24)
         self.font_small = pygame.font.Font(None, 18)
-        
-        # Game state
-        self.reset_game()
-        
-        # Sound generation
-        self.generate_sounds()
-        
-    def generate_sounds(self):
-        """Generate sound effects using pygame"""
-        try:
-            import numpy as np
-            # Create sound arrays for different effects
-            sample_rate = 22050
-            
-            # Success sound (ascending notes)
-            duration = 0.2
-            frames = int(duration * sample_rate)
-            wave = 4096 * np.sin(2 * np.pi * 523 * np.arange(frames) / sample_rate)  # C note
-            stereo_wave = np.column_stack((wave, wave)).astype(np.int16)
-            stereo_wave = np.ascontiguousarray(stereo_wave)
-            self.success_sound = pygame.sndarray.make_sound(stereo_wave)
-            
-            # Error sound (low buzz)
-            duration = 0.3
-            frames = int(duration * sample_rate)
-            wave = 2048 * np.sin(2 * np.pi * 200 * np.arange(frames) / sample_rate)
-            stereo_wave = np.column_stack((wave, wave)).astype(np.int16)
-            stereo_wave = np.ascontiguousarray(stereo_wave)
-            self.error_sound = pygame.sndarray.make_sound(stereo_wave)
-            
-            # Game over sound
-            duration = 0.5
-            frames = int(duration * sample_rate)
-            wave = 3072 * np.sin(2 * np.pi * 150 * np.arange(frames) / sample_rate)
-            stereo_wave = np.column_stack((wave, wave)).astype(np.int16)
-            stereo_wave = np.ascontiguousarray(stereo_wave)
-            self.game_over_sound = pygame.sndarray.make_sound(stereo_wave)
-            
-        except (ImportError, Exception) as e:
-            # Fallback: create dummy sound objects that don't play anything
-            print(f"Sound generation failed ({e}), sounds disabled")
-            self.success_sound = None
-            self.error_sound = None
-            self.game_over_sound = None
-    
-    def reset_game(self):
-        """Reset game to initial state"""
-        self.snake = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
-        self.direction = (0, 0)
-        self.score = 0
-        self.level = 0
-        self.lives = 2  # Player gets 2 wrong eggs before game over
-        self.base_speed = 8  # FPS divisor
-        self.current_speed = self.base_speed
-        self.wrong_egg_penalty = False
-        self.penalty_timer = 0
-        self.game_over = False
-        self.paused = False
-        self.numbers_to_collect = []
-        self.collected_numbers = []
-        
-        # Timer system
-        self.level_time_limit = self.get_time_limit_for_level(self.level)
-        self.time_remaining = self.level_time_limit
-        self.timer_running = False
-        
-        self.generate_equation()
-        self.generate_eggs()
-    
-    def get_time_limit_for_level(self, level):
-        """Get time limit in seconds for each level"""
-        base_time = 45  # 45 seconds for level 0
-        return max(20, base_time - (level * 3))  # Decrease by 3 seconds per level, minimum 20 seconds
-    
-    def generate_equation(self):
-        """Generate a random math equation based on current level"""
-        if self.level == 0:
-            # Level 0: Simple addition/subtraction (single operation)
-            operations = ['+', '-']
-            operation = random.choice(operations)
-            
-            if operation == '+':
-                num1 = random.randint(1, 10)
-                num2 = random.randint(1, 10)
-                answer = num1 + num2
-            else:  # subtraction
-                num1 = random.randint(10, 20)
-                num2 = random.randint(1, num1 - 1)
-                answer = num1 - num2
-            
-            self.current_equation = {
-                'equation': f"{num1} {operation} {num2} = ?",
-                'answer': answer,
-                'numbers': [num1, num2],
-                'operations': [operation]
-            }
-            
-        elif self.level == 1:
-            # Level 1: Add multiplication and division
-            operations = ['+', '-', '*', '/']
-            operation = random.choice(operations)
-            
-            if operation == '+':
-                num1 = random.randint(5, 15)
-                num2 = random.randint(5, 15)
-                answer = num1 + num2
-            elif operation == '-':
-                num1 = random.randint(15, 25)
-                num2 = random.randint(1, num1 - 1)
-                answer = num1 - num2
-            elif operation == '*':
-                num1 = random.randint(2, 8)
-                num2 = random.randint(2, 8)
-                answer = num1 * num2
-            else:  # division
-                answer = random.randint(2, 12)
-                num2 = random.randint(2, 6)
-                num1 = answer * num2
-            
-            self.current_equation = {
-                'equation': f"{num1} {operation} {num2} = ?",
-                'answer': answer,
-                'numbers': [num1, num2],
-                'operations': [operation]
-            }
-            
-        else:
-            # Level 2+: Complex equations with multiple operations
-            complexity = min(self.level, 5)  # Cap complexity at level 5
-            
-            if complexity == 2:
-                # Two operations: a + b - c = ?
-                num1 = random.randint(10, 20)
-                num2 = random.randint(1, 10)
-                num3 = random.randint(1, min(10, num1 + num2 - 1))
-                answer = num1 + num2 - num3
-                
-                self.current_equation = {
-                    'equation': f"{num1} + {num2} - {num3} = ?",
-                    'answer': answer,
-                    'numbers': [num1, num2, num3],
-                    'operations': ['+', '-']
-                }
-                
-            elif complexity == 3:
-                # Three operations: a * b + c - d = ?
-                num1 = random.randint(2, 5)
-                num2 = random.randint(2, 5)
-                num3 = random.randint(5, 15)
-                num4 = random.randint(1, 10)
-                answer = num1 * num2 + num3 - num4
-                
-                self.current_equation = {
-                    'equation': f"{num1} × {num2} + {num3} - {num4} = ?",
-                    'answer': answer,
-                    'numbers': [num1, num2, num3, num4],
-                    'operations': ['*', '+', '-']
-                }
-                
-            elif complexity == 4:
-                # Four operations with division: a * b / c + d = ?
-                num3 = random.randint(2, 4)  # divisor
-                num1 = random.randint(2, 6)
-                num2 = num3 * random.randint(2, 4)  # ensure clean division
-                num4 = random.randint(1, 10)
-                answer = (num1 * num2) // num3 + num4
-                
-                self.current_equation = {
-                    'equation': f"{num1} × {num2} ÷ {num3} + {num4} = ?",
-                    'answer': answer,
-                    'numbers': [num1, num2, num3, num4],
-                    'operations': ['*', '/', '+']
-                }
-                
-            else:  # complexity >= 5
-                # Complex: a + b * c - d / e = ?
-                num1 = random.randint(5, 15)
-                num2 = random.randint(2, 5)
-                num3 = random.randint(2, 5)
-                num5 = random.randint(2, 4)  # divisor
-                num4 = num5 * random.randint(2, 6)  # ensure clean division
-                answer = num1 + (num2 * num3) - (num4 // num5)
-                
-                self.current_equation = {
-                    'equation': f"{num1} + {num2} × {num3} - {num4} ÷ {num5} = ?",
-                    'answer': answer,
-                    'numbers': [num1, num2, num3, num4, num5],
-                    'operations': ['+', '*', '-', '/']
-                }
-    
-    def generate_eggs(self):
-        """Generate eggs with numbers on the field"""
-        self.eggs = []
-        self.numbers_to_collect = self.current_equation['numbers'].copy()
-        self.collected_numbers = []
-        
-        # Add target number eggs (the ones we need to collect)
-        for target_num in self.numbers_to_collect:
-            pos = self.get_random_position()
-            while pos in [egg['pos'] for egg in self.eggs] or pos in self.snake:
-                pos = self.get_random_position()
-            
-            self.eggs.append({
-                'pos': pos,
-                'number': target_num,
-                'is_target': True,
-                'collected': False
-            })
-        
-        # Add decoy eggs (wrong numbers) - more decoys for higher levels
-        decoy_count = 6 + self.level  # More decoys as level increases
-        decoy_numbers = set()
-        max_decoy_value = max(20, max(self.numbers_to_collect) + 10)
-        
-        while len(decoy_numbers) < decoy_count:
-            decoy_num = random.randint(1, max_decoy_value)
-            if decoy_num not in self.numbers_to_collect:
-                decoy_numbers.add(decoy_num)
-        
-        for decoy_num in decoy_numbers:
-            pos = self.get_random_position()
-            while pos in [egg['pos'] for egg in self.eggs] or pos in self.snake:
-                pos = self.get_random_position()
-            
-            self.eggs.append({
-                'pos': pos,
-                'number': decoy_num,
-                'is_target': False,
-                'collected': False
-            })
-    
-    def get_random_position(self):
-        """Get a random position on the grid"""
-        return (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+        self.text_cache = TextCache()
+        self.build_sprites()
+        
+        # Game state; boards larger than the view are drawn through a camera
+        # (top-left visible cell) that follows the head
+        self.camera = (0, 0)
+        super().__init__(board_size[0], board_size[1], tick_rates, seed, recorder)
+        
+        # A game left running at the last quit is saved; resume picks it up paused
+        self.resumed = False
+        if resume:
+            if load_game(self):
+                self.resumed = True
+                self.paused = True
+                print("Resumed the saved game - press P to continue")
+            else:
+                print("No saved game to resume, starting a new one")
+        
+        # Sound effects load in the background; sound=False skips audio entirely
+        self.sounds = SoundBank(enabled=sound)
+        
+    def init_pygame(self, sound):
+        """Start only the pygame subsystems the game uses (importing this module starts none)"""
+        pygame.display.init()
+        pygame.font.init()
+        if sound and not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error as e:
+                print(f"Audio unavailable ({e}), sounds disabled")
     
-    def handle_events(self):
-        """Handle pygame events"""
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        """Handle pygame events (by default the ones queued)"""
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 return False
             
@@ -283,6 +152,10 @@ class MathSnakeGame:
                 if event.key == pygame.K_ESCAPE:
                     return False
                 
+                if event.key == pygame.K_F3 and self.profiler is not None:
+                    self.profiler.toggle()
+                    continue
+                
                 if self.game_over:
                     if event.key == pygame.K_SPACE:
                         self.reset_game()
@@ -292,284 +165,522 @@ class MathSnakeGame:
                     self.paused = not self.paused
                     continue
                 
-                if not self.paused:
+                if not self.paused and self.autoplayer is None:
                     # Movement controls
-                    if event.key == pygame.K_UP and self.direction != (0, 1):
-                        self.direction = (0, -1)
-                    elif event.key == pygame.K_DOWN and self.direction != (0, -1):
-                        self.direction = (0, 1)
-                    elif event.key == pygame.K_LEFT and self.direction != (1, 0):
-                        self.direction = (-1, 0)
-                    elif event.key == pygame.K_RIGHT and self.direction != (-1, 0):
-                        self.direction = (1, 0)
+                    if event.key == pygame.K_UP:
+                        self.queue_turn(UP)
+                    elif event.key == pygame.K_DOWN:
+                        self.queue_turn(DOWN)
+                    elif event.key == pygame.K_LEFT:
+                        self.queue_turn(LEFT)
+                    elif event.key == pygame.K_RIGHT:
+                        self.queue_turn(RIGHT)
+        
+        # The autoplayer starts the next game straight away (soak runs)
+        if self.game_over and self.autoplayer is not None:
+            self.reset_game()
         
         return True
     
-    def update(self):
-        """Update game state"""
-        if self.game_over or self.paused or self.direction == (0, 0):
+    def queue_turn(self, direction):
+        """Queue a turn for a coming tick, checked against the direction it will follow"""
+        last = self.input_queue[-1][0] if self.input_queue else self.direction
+        if direction == last or direction == (-last[0], -last[1]):
             return
-        
-        # Start timer when player starts moving
-        if not self.timer_running and self.direction != (0, 0):
-            self.timer_running = True
-        
-        # Update timer
-        if self.timer_running:
-            self.time_remaining -= 1/60  # Decrease by 1/60 second each frame (60 FPS)
-            if self.time_remaining <= 0:
-                self.end_game("Time's up!")
-                return
-        
-        # Handle penalty timer
-        if self.wrong_egg_penalty:
-            self.penalty_timer -= 1
-            if self.penalty_timer <= 0:
-                self.wrong_egg_penalty = False
-                self.current_speed = self.base_speed
-        
-        # Move snake
-        head_x, head_y = self.snake[0]
-        new_head = (head_x + self.direction[0], head_y + self.direction[1])
-        
-        # Check wall collision
-        if (new_head[0] < 0 or new_head[0] >= GRID_WIDTH or 
-            new_head[1] < 0 or new_head[1] >= GRID_HEIGHT):
-            self.end_game("Hit the wall!")
-            return
-        
-        # Check self collision
-        if new_head in self.snake:
-            self.end_game("Hit yourself!")
+        if len(self.input_queue) >= INPUT_QUEUE_SIZE:
+            self.input_latency.discarded += 1
             return
-        
-        self.snake.insert(0, new_head)
-        
-        # Check egg collision
-        eaten_egg = None
-        for egg in self.eggs:
-            if egg['pos'] == new_head and not egg.get('collected', False):
-                eaten_egg = egg
-                break
-        
-        if eaten_egg:
-            if eaten_egg['is_target']:
-                # Correct target number
-                if self.success_sound:
-                    self.success_sound.play()
-                
-                eaten_egg['collected'] = True
-                self.collected_numbers.append(eaten_egg['number'])
-                
-                # Check if all target numbers are collected
-                if len(self.collected_numbers) == len(self.numbers_to_collect):
-                    # All numbers collected - equation solved!
-                    self.score += 1
-                    
-                    # Check for level up (every 3 equations solved)
-                    if self.score % 3 == 0:
-                        self.level += 1
-                        self.level_time_limit = self.get_time_limit_for_level(self.level)
-                        self.time_remaining = self.level_time_limit
-                        self.base_speed = max(4, self.base_speed - 1)
-                        self.current_speed = self.base_speed
-                    
-                    self.generate_equation()
-                    self.generate_eggs()
-                    
-                    # Reset penalty
-                    self.wrong_egg_penalty = False
-                    self.penalty_timer = 0
-                
-            else:
-                # Wrong number (decoy) - LOSE A LIFE!
-                if self.error_sound:
-                    self.error_sound.play()
-                
-                self.lives -= 1
-                eaten_egg['collected'] = True  # Mark as collected to remove from field
-                
-                # Check if game over (no lives left)
-                if self.lives <= 0:
-                    self.end_game("No lives left!")
-                    return
-                
-                self.wrong_egg_penalty = True
-                self.penalty_timer = 120  # 2 seconds at 60 FPS
-                self.current_speed = self.base_speed + 4  # Slow down
-        else:
-            # Remove tail if no egg eaten
-            self.snake.pop()
+        self.input_queue.append((direction, time.perf_counter()))
     
-    def end_game(self, reason="Game Over"):
-        """End the game"""
-        self.game_over = True
-        self.game_over_reason = reason
-        if self.game_over_sound:
-            self.game_over_sound.play()
+    def reset_game(self, seed=None):
+        super().reset_game(seed)
+        self.input_queue.clear()
     
-    def draw(self):
-        """Draw everything on screen"""
-        self.screen.fill(DARK_GRAY)
+    def update(self):
+        """Advance the game one logic tick and play sounds for what happened"""
+        action = None
+        pressed = None
+        if not (self.paused or self.game_over):
+            if self.autoplayer is not None:
+                action = self.autoplayer.act(self)
+            elif self.input_queue:
+                action, pressed = self.input_queue.popleft()
+        equation, level = self.equations.last, self.level
+        events = self.step(action)
+        if pressed is not None:
+            self.input_latency.applied(pressed)
+        if events and self.telemetry is not None:
+            self.telemetry.record_step(self, events, equation, level)
+        for event in events:
+            if event == EVENT_TARGET:
+                self.sounds.play('success')
+            elif event == EVENT_DECOY:
+                self.sounds.play('error')
+            elif event == EVENT_GAME_OVER:
+                self.sounds.play('game_over')
+                if self.leaderboard is not None:
+                    self.final_entry = self.leaderboard.record(self)
+    
+    def build_layers(self, board_size):
+        """Prebake the static background and the game over overlay"""
+        # Boards smaller than the view only fill part of it, so the border shows where the walls are
+        self.game_rect = pygame.Rect(100, 150, min(board_size[0], VIEW_WIDTH) * GRID_SIZE,
+                                     min(board_size[1], VIEW_HEIGHT) * GRID_SIZE)
+        
+        self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.background.fill(DARK_GRAY)
+        pygame.draw.rect(self.background, LIGHT_GRAY, self.game_rect)
+        pygame.draw.rect(self.background, BLACK, self.game_rect, 2)
+        
+        # Semi-transparent overlay
+        self.overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.overlay.set_alpha(128)
+        self.overlay.fill(BLACK)
+    
+    def hud_items(self):
+        """Text shown around the board, as {name: (surface, rect)} in drawing order"""
+        items = {}
         
-        # Draw game area background
-        game_rect = pygame.Rect(100, 150, GAME_WIDTH, GAME_HEIGHT)
-        pygame.draw.rect(self.screen, LIGHT_GRAY, game_rect)
-        pygame.draw.rect(self.screen, BLACK, game_rect, 2)
+        def add(name, font, text, color, **position):
+            surface = self.text_cache.render(font, text, color)
+            items[name] = (surface, surface.get_rect(**position))
         
-        # Draw game info header
         header_y = 20
         
-        # Draw equation
-        equation_text = self.font_large.render(self.current_equation['equation'], True, BLUE)
-        equation_rect = equation_text.get_rect(center=(WINDOW_WIDTH // 2, 50))
-        self.screen.blit(equation_text, equation_rect)
-        
-        # Draw level, score, lives, and timer
-        level_text = self.font_medium.render(f"Level: {self.level}", True, WHITE)
-        self.screen.blit(level_text, (20, header_y))
-        
-        score_text = self.font_medium.render(f"Score: {self.score}", True, RED)
-        score_rect = score_text.get_rect(topright=(WINDOW_WIDTH - 20, header_y))
-        self.screen.blit(score_text, score_rect)
-        
-        lives_text = self.font_medium.render(f"Lives: {self.lives}", True, RED)
-        self.screen.blit(lives_text, (20, header_y + 25))
+        # Equation, level, score, lives, and timer
+        add('equation', self.font_large, self.current_equation['equation'], BLUE, center=(WINDOW_WIDTH // 2, 50))
+        add('level', self.font_medium, f"Level: {self.level}", WHITE, topleft=(20, header_y))
+        add('score', self.font_medium, f"Score: {self.score}", RED, topright=(WINDOW_WIDTH - 20, header_y))
+        add('lives', self.font_medium, f"Lives: {self.lives}", RED, topleft=(20, header_y + 25))
         
         # Timer with color coding
         timer_color = RED if self.time_remaining < 10 else ORANGE if self.time_remaining < 20 else WHITE
-        timer_text = self.font_medium.render(f"Time: {int(self.time_remaining)}s", True, timer_color)
-        timer_rect = timer_text.get_rect(topright=(WINDOW_WIDTH - 20, header_y + 25))
-        self.screen.blit(timer_text, timer_rect)
+        add('timer', self.font_medium, f"Time: {int(self.time_remaining)}s", timer_color,
+            topright=(WINDOW_WIDTH - 20, header_y + 25))
         
-        # Draw speed indicator
-        speed_text = self.font_small.render(f"Speed: {11 - self.base_speed}", True, GRAY)
-        self.screen.blit(speed_text, (20, header_y + 50))
+        # Speed indicator
+        add('speed', self.font_small, f"Speed: {11 - self.base_speed}", GRAY, topleft=(20, header_y + 50))
         
-        if not self.game_over:
-            # Draw snake
-            snake_color = ORANGE if self.wrong_egg_penalty else GREEN
-            head_color = RED if self.wrong_egg_penalty else LIGHT_GREEN
-            
-            for i, (x, y) in enumerate(self.snake):
-                rect = pygame.Rect(100 + x * GRID_SIZE, 150 + y * GRID_SIZE, 
-                                 GRID_SIZE - 1, GRID_SIZE - 1)
-                color = head_color if i == 0 else snake_color
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, BLACK, rect, 1)
-            
-            # Draw eggs (all eggs now look the same - no color coding!)
-            for egg in self.eggs:
-                if not egg['collected']:
-                    x, y = egg['pos']
-                    center = (100 + x * GRID_SIZE + GRID_SIZE // 2, 
-                             150 + y * GRID_SIZE + GRID_SIZE // 2)
-                    
-                    # Draw egg circle - all eggs are the same color now!
-                    egg_color = BLUE  # Same color for all eggs
-                    pygame.draw.circle(self.screen, egg_color, center, GRID_SIZE // 2 - 2)
-                    pygame.draw.circle(self.screen, BLACK, center, GRID_SIZE // 2 - 2, 2)
-                    
-                    # Draw number
-                    number_text = self.font_small.render(str(egg['number']), True, WHITE)
-                    number_rect = number_text.get_rect(center=center)
-                    self.screen.blit(number_text, number_rect)
-        
-        # Draw instructions
-        if self.direction == (0, 0) and not self.game_over:
-            instruction_text = self.font_medium.render("Collect ALL numbers from the equation! 2 wrong eggs = Game Over!", True, WHITE)
-            instruction_rect = instruction_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 80))
-            self.screen.blit(instruction_text, instruction_rect)
-        
-        # Draw collection progress
+        # Instructions
+        if self.direction == STOP and not self.game_over:
+            add('instructions', self.font_medium, "Collect ALL numbers from the equation! 2 wrong eggs = Game Over!",
+                WHITE, center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 80))
+        
+        # Collection progress
         if len(self.collected_numbers) > 0:
             progress_text = f"Collected: {', '.join(map(str, self.collected_numbers))}"
-            progress_surface = self.font_small.render(progress_text, True, WHITE)
-            self.screen.blit(progress_surface, (20, 100))
+            add('progress', self.font_small, progress_text, WHITE, topleft=(20, 100))
         
-        # Draw what numbers are needed
+        # What numbers are needed
         if len(self.numbers_to_collect) > 0:
             remaining_numbers = [n for n in self.numbers_to_collect if n not in self.collected_numbers]
             if remaining_numbers:
                 needed_text = f"Still need: {', '.join(map(str, remaining_numbers))}"
-                needed_surface = self.font_small.render(needed_text, True, BLUE)
-                self.screen.blit(needed_surface, (20, 120))
+                add('needed', self.font_small, needed_text, BLUE, topleft=(20, 120))
         
-        # Draw penalty indicator
+        # Penalty indicator
         if self.wrong_egg_penalty:
-            penalty_text = self.font_medium.render(f"WRONG NUMBER! Lives: {self.lives} | Snake slowed!", True, RED)
-            penalty_rect = penalty_text.get_rect(center=(WINDOW_WIDTH // 2, 100))
-            self.screen.blit(penalty_text, penalty_rect)
+            add('penalty', self.font_medium, f"WRONG NUMBER! Lives: {self.lives} | Snake slowed!", RED,
+                center=(WINDOW_WIDTH // 2, 100))
         
+        # Controls
+        controls = [
+            "Controls:",
+            "Arrow Keys - Move",
+            "P - Pause",
+            "ESC - Quit"
+        ]
+        
+        for i, control in enumerate(controls):
+            color = WHITE if i == 0 else GRAY
+            add(f'controls{i}', self.font_small, control, color, topleft=(20, WINDOW_HEIGHT - 100 + i * 20))
+        
+        # Profiler overlay
+        if self.profiler is not None and self.profiler.visible:
+            for i, line in enumerate(self.profiler.lines + self.input_latency.summary()):
+                add(f'profiler{i}', self.font_small, line, LIGHT_GRAY, topright=(WINDOW_WIDTH - 20, 70 + i * 14))
+        
+        return items
+    
+    def cell_rect(self, pos):
+        """Screen rectangle covered by a grid cell"""
+        return pygame.Rect(100 + (pos[0] - self.camera[0]) * GRID_SIZE, 150 + (pos[1] - self.camera[1]) * GRID_SIZE,
+                           GRID_SIZE, GRID_SIZE)
+    
+    def update_camera(self):
+        """Scroll the view when the head nears its edge, staying inside the board"""
+        head_x, head_y = self.snake[0]
+        cx, cy = self.camera
+        margin_x = min(CAMERA_MARGIN, (VIEW_WIDTH - 1) // 2)
+        margin_y = min(CAMERA_MARGIN, (VIEW_HEIGHT - 1) // 2)
+        cx = min(max(cx, head_x + margin_x + 1 - VIEW_WIDTH), head_x - margin_x)
+        cy = min(max(cy, head_y + margin_y + 1 - VIEW_HEIGHT), head_y - margin_y)
+        self.camera = (max(0, min(cx, self.width - VIEW_WIDTH)), max(0, min(cy, self.height - VIEW_HEIGHT)))
+    
+    def in_view(self, pos):
+        cx, cy = self.camera
+        return cx <= pos[0] < cx + VIEW_WIDTH and cy <= pos[1] < cy + VIEW_HEIGHT
+    
+    def visible_body(self):
+        """Snake cells inside the view, not counting the head"""
+        cx, cy = self.camera
+        if len(self.snake) <= VIEW_WIDTH * VIEW_HEIGHT:
+            return [(x, y) for x, y in itertools.islice(self.snake, 1, None)
+                    if cx <= x < cx + VIEW_WIDTH and cy <= y < cy + VIEW_HEIGHT]
+        
+        # Longer than the view has cells: scan the occupancy rows under the view instead
+        head = self.snake[0]
+        width = self.width
+        right = min(cx + VIEW_WIDTH, width)
+        cells = []
+        for y in range(cy, min(cy + VIEW_HEIGHT, self.height)):
+            row = self.occupied[y * width + cx:y * width + right]
+            x = row.find(1)
+            while x != -1:
+                if (cx + x, y) != head:
+                    cells.append((cx + x, y))
+                x = row.find(1, x + 1)
+        return cells
+    
+    def view_cells(self, rect):
+        """Board cells under a screen rectangle, limited to the view"""
+        area = rect.clip(self.game_rect)
+        if not area:
+            return []
+        cx, cy = self.camera
+        ys = range(cy + (area.top - 150) // GRID_SIZE,
+                   cy + min(VIEW_HEIGHT, (area.bottom - 151) // GRID_SIZE + 1, self.height - cy))
+        xs = range(cx + (area.left - 100) // GRID_SIZE,
+                   cx + min(VIEW_WIDTH, (area.right - 101) // GRID_SIZE + 1, self.width - cx))
+        return [(x, y) for y in ys for x in xs]
+    
+    def build_sprites(self):
+        """Pre-render snake segments and numbered eggs into the sprite atlas"""
+        # All eggs are the same color - no hints!
+        self.sprites = BoardSprites(GRID_SIZE, self.font_small, (LIGHT_GREEN, GREEN, RED, ORANGE),
+                                    BLUE, BLACK, WHITE, eggs=MAX_EGG_SPRITE)
+        self.atlas = self.sprites.atlas
+    
+    def cell_blit(self, pos):
+        """Blit arguments for whatever is on a grid cell, or None if it is empty"""
+        dest = self.cell_rect(pos).topleft
+        if self.is_occupied(pos):
+            if pos == self.snake[0]:
+                color = RED if self.wrong_egg_penalty else LIGHT_GREEN
+            else:
+                color = ORANGE if self.wrong_egg_penalty else GREEN
+            return (self.atlas.surface, dest, self.atlas.areas[('segment', color)])
+        egg = self.egg_at.get(pos)
+        if egg is not None:
+            return (self.atlas.surface, dest, self.sprites.egg_area(egg.number))
+        return None
+    
+    def draw_overlays(self):
+        """Draw the pause box and the game over screen"""
         # Draw pause indicator
         if self.paused:
-            pause_text = self.font_large.render("PAUSED - Press P to continue", True, WHITE)
+            pause_text = self.text_cache.render(self.font_large, "PAUSED - Press P to continue", WHITE)
             pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
             pygame.draw.rect(self.screen, BLACK, pause_rect.inflate(20, 10))
             self.screen.blit(pause_text, pause_rect)
         
         # Draw game over screen
         if self.game_over:
-            # Semi-transparent overlay
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.overlay, (0, 0))
             
             # Game over text
-            game_over_text = self.font_large.render("GAME OVER!", True, RED)
+            game_over_text = self.text_cache.render(self.font_large, "GAME OVER!", RED)
             game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 80))
             self.screen.blit(game_over_text, game_over_rect)
             
             # Game over reason
-            reason_text = self.font_medium.render(getattr(self, 'game_over_reason', 'Game Over'), True, WHITE)
+            reason_text = self.text_cache.render(self.font_medium, self.game_over_reason or 'Game Over', WHITE)
             reason_rect = reason_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
             self.screen.blit(reason_text, reason_rect)
             
             # Final stats
-            final_score_text = self.font_medium.render(f"Final Score: {self.score}", True, WHITE)
+            final_score_text = self.text_cache.render(self.font_medium, f"Final Score: {self.score}", WHITE)
             final_score_rect = final_score_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))
             self.screen.blit(final_score_text, final_score_rect)
             
-            final_level_text = self.font_medium.render(f"Reached Level: {self.level}", True, WHITE)
+            final_level_text = self.text_cache.render(self.font_medium, f"Reached Level: {self.level}", WHITE)
             final_level_rect = final_level_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 10))
             self.screen.blit(final_level_text, final_level_rect)
             
-            restart_text = self.font_medium.render("Press SPACE to play again or ESC to quit", True, WHITE)
+            restart_text = self.text_cache.render(self.font_medium, "Press SPACE to play again or ESC to quit", WHITE)
             restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50))
             self.screen.blit(restart_text, restart_rect)
+            
+            if self.leaderboard is not None:
+                self.draw_leaderboard()
+    
+    def draw_leaderboard(self):
+        """Top scores under the game over text, read from the leaderboard's cache"""
+        board = self.leaderboard
+        top = WINDOW_HEIGHT // 2 + 85
+        rank = board.rank(self.final_entry) if self.final_entry is not None else None
+        if rank is not None:
+            message = "New high score!" if rank == 1 else f"#{rank} in the all-time top {board.top_n}"
+            text = self.text_cache.render(self.font_medium, message, ORANGE)
+            self.screen.blit(text, text.get_rect(center=(WINDOW_WIDTH // 2, top)))
+        
+        columns = (
+            ("Top scores", ALL),
+            (f"Best at level {self.level}", by_level(self.level)),
+            (f"{board.player}'s best ({board.games_played} games)", by_player(board.player)),
+        )
+        for i, (title, name) in enumerate(columns):
+            x = WINDOW_WIDTH // 2 + (i - 1) * 250
+            text = self.text_cache.render(self.font_small, title, WHITE)
+            self.screen.blit(text, text.get_rect(center=(x, top + 25)))
+            for row, (score, level, player, _) in enumerate(board.top(name, LEADERBOARD_ROWS)):
+                text = self.text_cache.render(self.font_small, f"{row + 1}. {player}  {score}  (level {level})", LIGHT_GRAY)
+                self.screen.blit(text, text.get_rect(center=(x, top + 45 + row * 16)))
+    
+    def draw(self):
+        """Draw everything on screen"""
+        self.update_camera()
+        if self.dirty_rendering:
+            self.draw_dirty()
+        else:
+            self.draw_full(self.hud_items())
+            pygame.display.flip()
+    
+    def draw_full(self, hud):
+        """Paint the whole frame into the back buffer"""
+        self.screen.blit(self.background, (0, 0))
         
-        # Draw controls
-        controls = [
-            "Controls:",
-            "Arrow Keys - Move",
-            "P - Pause",
-            "ESC - Quit"
-        ]
+        if not self.game_over:
+            # Snake and eggs from the sprite atlas in one batched blit
+            atlas = self.atlas.surface
+            areas = self.atlas.areas
+            snake_area = areas[('segment', ORANGE if self.wrong_egg_penalty else GREEN)]
+            head_area = areas[('segment', RED if self.wrong_egg_penalty else LIGHT_GREEN)]
+            
+            # Only what is inside the view: screen position = origin + cell * GRID_SIZE
+            cx, cy = self.camera
+            left, top = 100 - cx * GRID_SIZE, 150 - cy * GRID_SIZE
+            sprites = []
+            head = self.snake[0]
+            if self.in_view(head):
+                head_dest = (left + head[0] * GRID_SIZE, top + head[1] * GRID_SIZE)
+                if self.interpolate and not self.paused:
+                    # Slide the head toward its next cell between logic ticks
+                    offset = int(self.render_alpha * GRID_SIZE)
+                    head_dest = (head_dest[0] + self.direction[0] * offset,
+                                 head_dest[1] + self.direction[1] * offset)
+                sprites.append((atlas, head_dest, head_area))
+            sprites.extend((atlas, (left + x * GRID_SIZE, top + y * GRID_SIZE), snake_area)
+                           for x, y in self.visible_body())
+            
+            # All eggs look the same - no color coding!
+            for (x, y), egg in self.egg_at.items():
+                if cx <= x < cx + VIEW_WIDTH and cy <= y < cy + VIEW_HEIGHT:
+                    sprites.append((atlas, (left + x * GRID_SIZE, top + y * GRID_SIZE), self.sprites.egg_area(egg.number)))
+            
+            self.screen.blits(sprites, doreturn=False)
         
-        for i, control in enumerate(controls):
-            color = WHITE if i == 0 else GRAY
-            font = self.font_small if i == 0 else self.font_small
-            control_text = font.render(control, True, color)
-            self.screen.blit(control_text, (20, WINDOW_HEIGHT - 100 + i * 20))
+        for surface, rect in hud.values():
+            self.screen.blit(surface, rect)
         
+        self.draw_overlays()
+    
+    def redraw_all(self, state, hud):
+        """Full repaint in dirty-rectangle mode, remembering what is on screen"""
+        self.draw_full(hud)
         pygame.display.flip()
+        self.drawn_state = state
+        self.drawn_ticks = self.ticks
+        self.drawn_snake = deque(self.snake)
+        self.drawn_eggs = {pos: egg.number for pos, egg in self.egg_at.items()}
+        self.drawn_hud = hud
+    
+    def snake_changes(self):
+        """Cells the snake entered or left since the last frame, or None if they cannot be tracked"""
+        moves = self.ticks - self.drawn_ticks
+        if moves < 0 or moves > MAX_TRACKED_MOVES:
+            return None
+        
+        drawn = self.drawn_snake
+        changed = []
+        if moves:
+            changed.append(drawn[0])  # Old head turns into body
+            for i in range(min(moves, len(self.snake)) - 1, -1, -1):
+                drawn.appendleft(self.snake[i])
+                changed.append(self.snake[i])
+        while len(drawn) > len(self.snake):
+            changed.append(drawn.pop())
+        if len(drawn) != len(self.snake):
+            return None
+        self.drawn_ticks = self.ticks
+        return changed
+    
+    def draw_dirty(self):
+        """Repaint only what changed since the last frame and push just those rectangles"""
+        state = (self.paused, self.game_over, self.wrong_egg_penalty, self.camera,
+                 self.leaderboard.version if self.leaderboard is not None else None)
+        hud = self.hud_items()
+        if self.drawn_state != state:
+            self.redraw_all(state, hud)
+            return
+        
+        changed_cells = self.snake_changes()
+        if changed_cells is None:
+            self.redraw_all(state, hud)
+            return
+        
+        # Eggs placed or eaten
+        eggs = {pos: egg.number for pos, egg in self.egg_at.items()}
+        if eggs != self.drawn_eggs:
+            changed_cells.extend(pos for pos in self.drawn_eggs.keys() | eggs.keys()
+                                 if self.drawn_eggs.get(pos) != eggs.get(pos))
+        
+        # HUD values
+        dirty = []
+        for name in self.drawn_hud.keys() | hud.keys():
+            old, new = self.drawn_hud.get(name), hud.get(name)
+            if old != new:
+                if old:
+                    dirty.append(old[1])
+                if new:
+                    dirty.append(new[1])
+        
+        if not dirty and not changed_cells:
+            return
+        if self.paused or self.game_over:
+            # Something moved under an overlay
+            self.redraw_all(state, hud)
+            return
+        
+        # Grow the dirty area until it covers every cell and text it touches,
+        # so nothing is blended twice over itself
+        cells = set(filter(self.in_view, changed_cells))
+        dirty.extend(self.cell_rect(pos) for pos in cells)
+        redraw_text = set()
+        grown = True
+        while grown:
+            grown = False
+            for name, (surface, rect) in hud.items():
+                if name not in redraw_text and rect.collidelist(dirty) != -1:
+                    redraw_text.add(name)
+                    dirty.append(rect)
+                    grown = True
+            for rect in dirty:
+                for pos in self.view_cells(rect):
+                    if pos not in cells:
+                        cells.add(pos)
+                        dirty.append(self.cell_rect(pos))
+                        grown = True
+        
+        for rect in dirty:
+            self.screen.blit(self.background, rect, rect)
+        self.screen.blits([blit for blit in map(self.cell_blit, cells) if blit], doreturn=False)
+        for name, (surface, rect) in hud.items():
+            if name in redraw_text:
+                self.screen.blit(surface, rect)
+        
+        self.drawn_eggs = eggs
+        self.drawn_hud = hud
+        pygame.display.update(dirty)
+    
+    def is_idle(self):
+        """Whether nothing moves until the player presses a key"""
+        return ((self.paused or self.game_over or (self.direction == STOP and not self.input_queue))
+                and self.autoplayer is None)
+    
+    def idle_key(self):
+        """What can change on screen while idle without input"""
+        return self.leaderboard.version if self.leaderboard is not None else None
+    
+    def idle_frame(self):
+        """Sleep until input arrives (or the timeout passes) and redraw only if something changed"""
+        self.scheduler.pause()  # Idle time is not played when the game moves again
+        event = pygame.event.wait(IDLE_TIMEOUT_MS)
+        events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+        if not self.handle_events(events):
+            return False
+        
+        key = self.idle_key()
+        if self.idle_redraw or key != self.idle_drawn or any(e.type != pygame.MOUSEMOTION for e in events):
+            self.idle_redraw = False
+            self.idle_drawn = key
+            self.draw()
+            self.input_latency.displayed()
+        self.idle_frames += 1
+        return True
     
     def run(self):
         """Main game loop"""
-        frame_count = 0
+        scheduler = self.scheduler
+        profiler = self.profiler
+        start = time.perf_counter()
         
         while True:
+            # Event driven while idle; fixed-rate frames while the snake moves
+            if self.is_idle():
+                if not self.idle_frame():
+                    break
+                continue
+            self.idle_redraw = True
+            
+            if profiler:
+                profiler.begin_frame()
+            
             if not self.handle_events():
                 break
+            if profiler:
+                profiler.mark('events')
             
-            # Update game at reduced speed
-            if frame_count % self.current_speed == 0:
+            # Run as many fixed logic ticks as real time allows; the tick
+            # length follows the current speed
+            scheduler.begin_frame()
+            while scheduler.consume(self.tick_seconds()):
                 self.update()
+            self.render_alpha = scheduler.alpha(self.tick_seconds())
+            if profiler:
+                profiler.mark('update')
             
             self.draw()
-            self.clock.tick(60)  # 60 FPS
-            frame_count += 1
+            self.input_latency.displayed()
+            if profiler:
+                profiler.mark('draw')
+            
+            self.clock.tick(self.fps_limit)
+            if profiler:
+                profiler.mark('tick')
+                profiler.end_frame()
+        
+        if profiler:
+            for line in profiler.summary() + self.input_latency.summary():
+                print(line)
+            if self.trace_path:
+                profiler.dump_trace(self.trace_path)
+                print(f"Frame trace written to {self.trace_path}")
+        
+        if self.fps_limit == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{scheduler.frames} frames in {elapsed:.1f}s: {scheduler.frames / elapsed:.0f} FPS, "
+                  f"{scheduler.ticks} logic ticks, {scheduler.skipped_frames} skipped frames")
+        
+        if self.recorder is not None:
+            self.recorder.close(self)
+        
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        
+        # Keep an unfinished game for --resume. The save is only removed once
+        # the game it holds is over (or restarted), never by a run that didn't load it.
+        if self.autoplayer is None:
+            if self.ticks and not self.game_over:
+                try:
+                    save_game(self)
+                    print("Game saved - run with --resume to continue it")
+                except OSError as e:
+                    print(f"Could not save the game ({e})")
+            elif self.resumed:
+                discard_game()
         
         pygame.quit()
         sys.exit()
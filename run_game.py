@@ -4,22 +4,21 @@ Math Snake Game Runner
 Checks for pygame installation and runs the game
 """
 
+import argparse
+import importlib.util
 import sys
 import subprocess
 
 def check_pygame():
-    """Check if pygame is installed"""
-    try:
-        import pygame
-        return True
-    except ImportError:
-        return False
+    """Check if pygame is installed, without importing it"""
+    return importlib.util.find_spec("pygame") is not None
 
 def install_pygame():
     """Install pygame using pip"""
     print("Pygame not found. Installing...")
     try:
         subprocess.check_call([sys.executable, "-m", "pip", "install", "pygame"])
+        importlib.invalidate_caches()  # So the fresh install is importable in this process
         print("Pygame installed successfully!")
         return True
     except subprocess.CalledProcessError:
@@ -27,12 +26,73 @@ def install_pygame():
         print("pip install pygame")
         return False
 
+def board_size(text):
+    """Parse a WxH board size"""
+    try:
+        width, height = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    if width < 2 or height < 2:
+        raise argparse.ArgumentTypeError("the board needs at least 2x2 cells")
+    return width, height
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Math Snake Game")
+    parser.add_argument("--dirty", action="store_true",
+                        help="repaint only changed screen areas")
+    parser.add_argument("--interpolate", action="store_true",
+                        help="smooth the snake head between logic ticks")
+    parser.add_argument("--uncapped", action="store_true",
+                        help="render as fast as possible and report FPS on exit")
+    parser.add_argument("--seed", type=int,
+                        help="seed the session so games can be reproduced")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record inputs to a replay log (check with snake_replay.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each frame; F3 shows the performance overlay")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="profile and write a chrome://tracing frame trace on exit")
+    parser.add_argument("--autoplay", action="store_true",
+                        help="let the pathfinding bot play (restarts after each game)")
+    parser.add_argument("--board", metavar="WxH", type=board_size, default=None,
+                        help="board size in cells, e.g. 1000x1000 (the view scrolls with the snake)")
+    parser.add_argument("--mute", action="store_true",
+                        help="no sound effects (skips loading them)")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="don't log gameplay events (see snake_telemetry.py for the report)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the game that was running when you last quit")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="join a multiplayer server (see snake_server.py) instead of playing alone")
+    parser.add_argument("--name", default="player",
+                        help="your name on the leaderboard and the multiplayer scoreboard")
+    args = parser.parse_args()
+    if args.record and args.resume:
+        # Replay logs rebuild each game from its seed, which a resumed game doesn't start from
+        parser.error("--record can't be used with --resume")
+    return args
+
 def main():
     """Main function to run the game"""
+    args = parse_args()
+    
+    # Fast path: pygame is found without importing it, and pip only runs when it is missing
     if not check_pygame():
         if not install_pygame():
             sys.exit(1)
     
+    if args.connect:
+        import asyncio
+        from snake_net_client import NetworkGame
+        host, _, port = args.connect.rpartition(":")
+        try:
+            asyncio.run(NetworkGame(args.name).run(host or "127.0.0.1", int(port)))
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Could not join {args.connect}: {e}")
+            sys.exit(1)
+        return
+    
     # Import and run the game
     try:
         from math_snake_pygame import MathSnakeGame
@@ -53,7 +113,48 @@ def main():
         print("🎯 CHALLENGE: All eggs look identical - no hints!")
         print("⚡ SPEED: Snake gets faster every level")
         
-        game = MathSnakeGame()
+        recorder = None
+        if args.record:
+            from snake_replay import InputRecorder
+            recorder = InputRecorder(args.record)
+        
+        profiler = None
+        if args.profile or args.trace:
+            from snake_profiler import FrameProfiler
+            profiler = FrameProfiler()
+        
+        autoplayer = None
+        if args.autoplay:
+            from snake_autoplay import PathAgent
+            autoplayer = PathAgent()
+        
+        # Bot games stay off the leaderboard and out of the telemetry
+        leaderboard = None
+        telemetry = None
+        if not args.autoplay:
+            from snake_leaderboard import Leaderboard
+            leaderboard = Leaderboard(player=args.name)
+            if not args.no_telemetry:
+                from snake_telemetry import Telemetry
+                telemetry = Telemetry(player=args.name)
+        
+        options = {}
+        if args.board:
+            options["board_size"] = args.board
+        
+        game = MathSnakeGame(dirty_rendering=args.dirty,
+                             fps_limit=0 if args.uncapped else 60,
+                             interpolate=args.interpolate,
+                             seed=args.seed,
+                             recorder=recorder,
+                             profiler=profiler,
+                             trace_path=args.trace,
+                             sound=not args.mute,
+                             autoplayer=autoplayer,
+                             resume=args.resume,
+                             leaderboard=leaderboard,
+                             telemetry=telemetry,
+                             **options)
         game.run()
     except Exception as e:
         print(f"Error running game: {e}")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Math Snake autoplayer
+A bot that plays by the real rules: it works out which eggs belong to the
+equation, plans a shortest route to the nearest one with breadth-first
+search, and steers round decoys, walls and its own body. Plans are kept
+between ticks and only redone when the board changes under them.
+
+    python snake_autoplay.py 50      # play 50 headless games and report
+"""
+
+import random
+import sys
+import time
+from array import array
+from collections import Counter, deque
+
+from snake_engine import SnakeEngine, STOP, DIRECTIONS
+
+# Boards up to this many cells get a precomputed neighbour table; bigger ones
+# (large-board mode) work neighbours out on demand to save memory
+NEIGHBOUR_TABLE_CELLS = 1 << 16
+
+
+def cell_neighbours(cell, width, height):
+    """Cells next to a cell with the direction that leads there"""
+    x, y = cell % width, cell // width
+    return tuple(((y + dy) * width + x + dx, (dx, dy)) for dx, dy in DIRECTIONS
+                 if 0 <= x + dx < width and 0 <= y + dy < height)
+
+
+class Neighbours:
+    """On-demand stand-in for the neighbour table"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def __getitem__(self, cell):
+        return cell_neighbours(cell, self.width, self.height)
+
+
+class PathAgent:
+    """Shortest-path player.
+
+    act(engine) returns the direction for the next tick. Search arrays are
+    allocated once per board size and "cleared" by bumping a stamp, so a
+    search only touches the cells it reaches.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.size = None
+        self.plan = deque()      # Directions still to take
+        self.goal = None         # Egg position the plan leads to
+        self.eggs = None         # The engine's egg_at the plan was made for
+        self.next_head = None    # Where the head should be when act() is next called
+
+        # Statistics
+        self.decisions = 0
+        self.searches = 0
+
+    def prepare(self, engine):
+        """Size the search arrays for the engine's board"""
+        if (engine.width, engine.height) != self.size:
+            self.size = (engine.width, engine.height)
+            self.cells = cells = engine.width * engine.height
+            self.seen = array('I', bytes(4 * cells))     # Stamp of the search that reached a cell
+            self.parent = array('i', bytes(4 * cells))
+            self.distance = array('i', bytes(4 * cells))
+            self.stamp = 0
+            self.plan.clear()
+
+            # Each cell's neighbours with the direction that leads there
+            if cells <= NEIGHBOUR_TABLE_CELLS:
+                self.adjacent = [cell_neighbours(cell, engine.width, engine.height) for cell in range(cells)]
+            else:
+                self.adjacent = Neighbours(engine.width, engine.height)
+
+    def targets(self, engine):
+        """Positions of live eggs whose numbers the equation still needs"""
+        remaining = Counter(engine.current_equation['numbers'])
+        remaining.subtract(engine.collected_numbers)
+        return {pos for pos, egg in engine.egg_at.items() if remaining[egg.number] > 0}
+
+    def act(self, engine):
+        self.decisions += 1
+        self.prepare(engine)
+        head = engine.snake[0]
+
+        # Keep following the plan unless the board changed under it
+        if (not self.plan or engine.egg_at is not self.eggs or self.goal not in engine.egg_at
+                or head != self.next_head):
+            self.replan(engine)
+
+        if self.plan:
+            direction = self.plan.popleft()
+        else:
+            direction = self.survive(engine)
+        if direction is not None:
+            self.next_head = (head[0] + direction[0], head[1] + direction[1])
+        return direction
+
+    def replan(self, engine):
+        """Breadth-first search from the head; plan a route to the nearest needed egg that is safe to eat"""
+        self.searches += 1
+        self.plan.clear()
+        self.goal = None
+        self.eggs = engine.egg_at
+
+        width = engine.width
+        targets = {y * width + x for x, y in self.targets(engine)}
+        if not targets:
+            return
+        decoys = {y * width + x for (x, y) in engine.egg_at} - targets
+
+        # Body cells open up as the tail moves on: the cell i places from the
+        # head can be entered from step len - i + 1 on
+        length = len(engine.snake)
+        free_at = {y * width + x: length - i + 1 for i, (x, y) in enumerate(engine.snake)}
+
+        self.stamp += 1
+        stamp, seen, parent, distance = self.stamp, self.seen, self.parent, self.distance
+        head_x, head_y = engine.snake[0]
+        start = head_y * width + head_x
+        seen[start] = stamp
+        distance[start] = 0
+        backwards = (-engine.direction[0], -engine.direction[1])
+        queue = deque([start])
+        found = []
+        adjacent = self.adjacent
+
+        while queue:
+            cell = queue.popleft()
+            step = distance[cell] + 1
+            for next_cell, direction in adjacent[cell]:
+                if seen[next_cell] == stamp or next_cell in decoys:
+                    continue
+                if cell == start and direction == backwards:
+                    continue
+                if engine.occupied[next_cell] and step < free_at.get(next_cell, 0):
+                    continue
+                seen[next_cell] = stamp
+                parent[next_cell] = cell
+                distance[next_cell] = step
+                if next_cell in targets:
+                    found.append(next_cell)  # Eggs are eaten, never walked through
+                else:
+                    queue.append(next_cell)
+            if len(found) == len(targets):
+                break
+
+        # Nearest first; skip eggs that would leave the snake boxed in
+        for goal in found:
+            path = self.path(engine, start, goal)
+            if self.safe_after(engine, path, decoys):
+                self.plan.extend(direction for _, direction in path)
+                self.goal = (goal % width, goal // width)
+                return
+
+    def path(self, engine, start, goal):
+        """(cell, direction) steps from start to goal along the parent links"""
+        width = engine.width
+        steps = []
+        cell = goal
+        while cell != start:
+            previous = self.parent[cell]
+            steps.append((cell, (cell % width - previous % width, cell // width - previous // width)))
+            cell = previous
+        steps.reverse()
+        return steps
+
+    def safe_after(self, engine, path, decoys):
+        """Whether the snake, having followed path and grown by one, can still reach open space or its tail"""
+        width = engine.width
+        body = [cell for cell, _ in reversed(path)]
+        body.extend(y * width + x for x, y in engine.snake)
+        del body[len(engine.snake) + 1:]
+        tail = body[-1]
+        blocked = set(body[:-1]) | decoys
+        room = self.room(engine, body[0], blocked, len(body))
+        return room >= len(body) or self.seen[tail] == self.stamp
+
+    def survive(self, engine):
+        """No needed egg is safely reachable: move to the safe cell with the most room around it"""
+        width = engine.width
+        head_x, head_y = engine.snake[0]
+        backwards = (-engine.direction[0], -engine.direction[1])
+        blocked = {y * width + x for (x, y) in engine.egg_at}
+        blocked.update(y * width + x for x, y in engine.snake)
+        best = None
+        for cell, direction in self.adjacent[head_y * width + head_x]:
+            if direction == backwards or cell in blocked:
+                continue
+            # Room is only counted up to a few snake lengths, which keeps big boards cheap
+            key = (self.room(engine, cell, blocked, 2 * len(engine.snake) + 64), self.rng.random())
+            if best is None or key > best[0]:
+                best = (key, direction)
+        return best[1] if best else None
+
+    def room(self, engine, start, blocked, limit):
+        """Free cells reachable from start (counting start itself), up to limit (flood fill)"""
+        self.stamp += 1
+        stamp, seen, adjacent = self.stamp, self.seen, self.adjacent
+        seen[start] = stamp
+        stack = [start]
+        count = 0
+        while stack and count < limit:
+            cell = stack.pop()
+            count += 1
+            for next_cell, _ in adjacent[cell]:
+                if seen[next_cell] != stamp and next_cell not in blocked:
+                    seen[next_cell] = stamp
+                    stack.append(next_cell)
+        return count
+
+
+def play(games, seed=None, **engine_args):
+    """Play headless games with PathAgent; returns (results Counter, decisions per second, agent)"""
+    engine = SnakeEngine(seed=seed, **engine_args)
+    agent = PathAgent(random.Random(seed))
+    results = Counter()
+    decisions = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        engine.reset_game()
+        while not engine.game_over:
+            direction = agent.act(engine)
+            engine.step(direction)
+            decisions += 1
+            if engine.direction == STOP:
+                break
+        results['score'] += engine.score
+        results['level'] += engine.level
+        results[engine.game_over_reason] += 1
+    elapsed = time.perf_counter() - start
+    return results, decisions / elapsed, agent
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    results, rate, agent = play(count, seed=1)
+    print(f"{count} games: mean score {results.pop('score') / count:.1f}, "
+          f"mean level {results.pop('level') / count:.2f}")
+    for reason, n in results.most_common():
+        print(f"  {reason}: {n}")
+    print(f"{rate:,.0f} decisions/s, one search every {agent.decisions / max(1, agent.searches):.1f} decisions")
@@ -0,0 +1,341 @@
+"""
+Math Snake batched simulation
+Holds N independent boards as NumPy arrays and advances all of them with one
+vectorized step, following the same rules as SnakeEngine.step().
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from snake_engine import (
+    GRID_WIDTH, GRID_HEIGHT, BASE_TICK_RATE, PENALTY_SECONDS, Difficulty,
+    EVENT_TARGET, EVENT_DECOY, EVENT_SOLVED, EVENT_LEVEL_UP, EVENT_GAME_OVER,
+)
+from equation_bank import load_bank
+
+# Action codes: 0 keeps the current direction
+KEEP, UP, DOWN, LEFT, RIGHT = range(5)
+DIR_DX = np.array([0, 0, 0, -1, 1], dtype=np.int32)
+DIR_DY = np.array([0, -1, 1, 0, 0], dtype=np.int32)
+OPPOSITE = np.array([KEEP, DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+
+# Game over reasons, indexed by BatchSnakeEnv.reason
+REASONS = (None, "Time's up!", "Hit the wall!", "Hit yourself!", "No lives left!")
+TIME_UP, HIT_WALL, HIT_SELF, NO_LIVES = range(1, 5)
+
+
+class BatchSnakeEnv:
+    def __init__(self, num_games, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None, difficulty=None):
+        self.num_games = num_games
+        self.difficulty = difficulty or Difficulty()   # Shared by every board
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.np_rng = np.random.default_rng(seed)
+        self.bank = load_bank()
+
+        n = num_games
+        # Snake bodies as ring buffers of flat cell indices (y * width + x)
+        self.body = np.zeros((n, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.head_x = np.zeros(n, dtype=np.int32)
+        self.head_y = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+
+        # Per-board grids: snake occupancy and egg numbers (0 = no egg)
+        self.occupied = np.zeros((n, self.cells), dtype=bool)
+        self.egg_number = np.zeros((n, self.cells), dtype=np.int16)
+        self.egg_target = np.zeros((n, self.cells), dtype=bool)
+
+        self.score = np.zeros(n, dtype=np.int32)
+        self.level = np.zeros(n, dtype=np.int32)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.base_speed = np.zeros(n, dtype=np.int32)
+        self.current_speed = np.zeros(n, dtype=np.int32)
+        self.wrong_egg_penalty = np.zeros(n, dtype=bool)
+        self.penalty_timer = np.zeros(n, dtype=np.float64)
+        self.time_remaining = np.zeros(n, dtype=np.float64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.collected = np.zeros(n, dtype=np.int32)
+        self.needed = np.zeros(n, dtype=np.int32)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.reason = np.zeros(n, dtype=np.int8)
+        # Current equation as its bank (table, index); see equation()
+        self.equation_table = np.zeros(n, dtype=np.int8)
+        self.equation_index = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Reset the selected games (all of them by default) to the initial state"""
+        games = np.arange(self.num_games) if mask is None else np.flatnonzero(mask)
+        if len(games) == 0:
+            return
+
+        start_x, start_y = self.width // 2, self.height // 2
+        start = start_y * self.width + start_x
+        self.occupied[games] = False
+        self.occupied[games, start] = True
+        self.body[games, 0] = start
+        self.head_ptr[games] = 0
+        self.length[games] = 1
+        self.head_x[games] = start_x
+        self.head_y[games] = start_y
+        self.direction[games] = KEEP
+
+        self.score[games] = 0
+        self.level[games] = 0
+        self.lives[games] = 2
+        self.base_speed[games] = self.difficulty.speed_start
+        self.current_speed[games] = self.difficulty.speed_start
+        self.wrong_egg_penalty[games] = False
+        self.penalty_timer[games] = 0
+        self.time_remaining[games] = self.time_limit(self.level[games])
+        self.ticks[games] = 0
+        self.game_over[games] = False
+        self.reason[games] = 0
+
+        self.new_equations(games)
+
+    def time_limit(self, level):
+        """Vectorized SnakeEngine.get_time_limit_for_level()"""
+        d = self.difficulty
+        return np.maximum(d.time_min, d.time_base - level * d.time_step)
+
+    def new_equations(self, games):
+        """Generate fresh equations and egg layouts for the given games.
+
+        Everything is vectorized per level: games on the same level need the
+        same number of eggs, so each level is one batch of array operations.
+        """
+        if len(games) == 0:
+            return
+
+        games = np.asarray(games)
+        self.egg_number[games] = 0
+        self.egg_target[games] = False
+        self.collected[games] = 0
+
+        d = self.difficulty
+        levels = self.level[games]
+        for level in np.unique(levels).tolist():
+            group = games[levels == level]
+            table = self.bank.table(level)
+            picks = self.bank.sample_indices(level, len(group), self.np_rng)
+            self.equation_table[group] = table.level
+            self.equation_index[group] = picks
+
+            numbers = np.frombuffer(table.numbers, dtype=np.int16).reshape(-1, table.width)[picks]
+            self.needed[group] = table.width
+            decoys = self.draw_decoys(numbers, d.decoys_base + d.decoys_per_level * level)
+            values = np.concatenate([numbers, decoys], axis=1)
+            target = np.zeros(values.shape, dtype=bool)
+            target[:, :table.width] = True
+            self.place_eggs(group, values, target)
+
+    def draw_decoys(self, numbers, count):
+        """Vectorized generate_decoys(): count distinct wrong numbers per row of numbers.
+
+        Each row draws from 1..max(20, max(numbers) + 10, count + len(numbers))
+        like generate_decoys: random keys over the candidate values, with values
+        out of the row's range or in its equation masked, and the count smallest kept.
+        """
+        rows = len(numbers)
+        if count <= 0:
+            return np.zeros((rows, 0), dtype=np.int16)
+        top = np.maximum(np.maximum(20, numbers.max(axis=1) + 10), count + numbers.shape[1])
+        span = int(top.max())
+        keys = self.np_rng.random((rows, span))
+        keys[np.arange(span) >= top[:, None]] = 2.0
+        valid = (numbers >= 1) & (numbers <= span)
+        row_index = np.broadcast_to(np.arange(rows)[:, None], numbers.shape)
+        keys[row_index[valid], numbers[valid] - 1] = 2.0
+        return np.argpartition(keys, count - 1, axis=1)[:, :count].astype(np.int16) + 1
+
+    def place_eggs(self, games, number, target):
+        """Put eggs on random free cells.
+
+        Each board draws a few more random cells than it needs and keeps the
+        first ones that are free and not repeated; the rare board where too
+        few survive takes its free cells in random order. A board with fewer
+        free cells than eggs gets as many as fit, targets first, like
+        SnakeEngine.generate_eggs().
+        """
+        count = number.shape[1]
+        rows = np.arange(len(games))[:, None]
+        draws = 2 * count + 8
+        cells = self.np_rng.integers(0, self.cells, size=(len(games), draws))
+        usable = ~self.occupied[games[:, None], cells]
+        # Repeats: keep only the first draw of each cell
+        order = np.argsort(cells, axis=1, kind='stable')
+        ordered = cells[rows, order]
+        repeat = np.zeros(cells.shape, dtype=bool)
+        repeat[rows, order[:, 1:]] = ordered[:, 1:] == ordered[:, :-1]
+        usable &= ~repeat
+        # First count usable draws of each board, in draw order
+        first = np.argsort(~usable, axis=1, kind='stable')[:, :count]
+        chosen = cells[rows, first]
+
+        short = np.flatnonzero(usable.sum(axis=1) < count)
+        if len(short):
+            keys = self.np_rng.random((len(short), self.cells))
+            keys[self.occupied[games[short]]] = 2.0
+            fit = min(count, self.cells)
+            picks = np.argsort(keys, axis=1)[:, :fit]
+            chosen[short, :fit] = picks
+            # Occupied cells sort last; leave those eggs out
+            keep = np.ones(chosen.shape, dtype=bool)
+            keep[short, :fit] = np.take_along_axis(keys, picks, axis=1) < 2.0
+            keep[short, fit:] = False
+            board, column = np.nonzero(keep)
+            self.egg_number[games[board], chosen[board, column]] = number[board, column]
+            self.egg_target[games[board], chosen[board, column]] = target[board, column]
+            return
+
+        self.egg_number[games[:, None], chosen] = number
+        self.egg_target[games[:, None], chosen] = target
+
+    def equation(self, g):
+        """Equation dict of game g"""
+        return self.bank.tables[self.equation_table[g]].equation(int(self.equation_index[g]))
+
+    def _end(self, games, reason, events):
+        self.game_over[games] = True
+        self.reason[games] = reason
+        events[EVENT_GAME_OVER][games] = True
+
+    def step(self, actions=None):
+        """Advance every game by one logic tick.
+
+        ``actions`` is an array of action codes (KEEP/UP/DOWN/LEFT/RIGHT), one
+        per game. Returns a dict mapping each EVENT_* value to a boolean array
+        of the games where it happened this tick.
+        """
+        n = self.num_games
+        events = {event: np.zeros(n, dtype=bool) for event in
+                  (EVENT_TARGET, EVENT_DECOY, EVENT_SOLVED, EVENT_LEVEL_UP, EVENT_GAME_OVER)}
+
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions != KEEP) & (actions != OPPOSITE[self.direction])
+            self.direction = np.where(turn, actions, self.direction)
+
+        idx = np.flatnonzero(~self.game_over & (self.direction != KEEP))
+        if len(idx) == 0:
+            return events
+
+        self.ticks[idx] += 1
+
+        # Timer
+        dt = self.current_speed[idx] / BASE_TICK_RATE
+        self.time_remaining[idx] -= dt
+        expired = self.time_remaining[idx] <= 0
+        self._end(idx[expired], TIME_UP, events)
+        idx = idx[~expired]
+
+        # Penalty timer
+        dt = dt[~expired]
+        penalty = self.wrong_egg_penalty[idx]
+        penalized = idx[penalty]
+        self.penalty_timer[penalized] -= dt[penalty]
+        recovered = penalized[self.penalty_timer[penalized] <= 0]
+        self.wrong_egg_penalty[recovered] = False
+        self.current_speed[recovered] = self.base_speed[recovered]
+
+        # Move heads and check wall collision
+        direction = self.direction[idx]
+        new_x = self.head_x[idx] + DIR_DX[direction]
+        new_y = self.head_y[idx] + DIR_DY[direction]
+        wall = (new_x < 0) | (new_x >= self.width) | (new_y < 0) | (new_y >= self.height)
+        self._end(idx[wall], HIT_WALL, events)
+        idx, new_x, new_y = idx[~wall], new_x[~wall], new_y[~wall]
+
+        # Self collision (the tail still counts, as in SnakeEngine)
+        cell = new_y * self.width + new_x
+        hit = self.occupied[idx, cell]
+        self._end(idx[hit], HIT_SELF, events)
+        idx, new_x, new_y, cell = idx[~hit], new_x[~hit], new_y[~hit], cell[~hit]
+
+        # Push new heads
+        self.head_ptr[idx] = (self.head_ptr[idx] + 1) % self.cells
+        self.body[idx, self.head_ptr[idx]] = cell
+        self.occupied[idx, cell] = True
+        self.length[idx] += 1
+        self.head_x[idx] = new_x
+        self.head_y[idx] = new_y
+
+        # Eggs
+        number = self.egg_number[idx, cell]
+        ate = number != 0
+        is_target = self.egg_target[idx, cell]
+        self.egg_number[idx[ate], cell[ate]] = 0
+
+        target = idx[ate & is_target]
+        events[EVENT_TARGET][target] = True
+        self.collected[target] += 1
+        solved = target[self.collected[target] == self.needed[target]]
+        events[EVENT_SOLVED][solved] = True
+        self.score[solved] += 1
+        level_up = solved[self.score[solved] % self.difficulty.equations_per_level == 0]
+        events[EVENT_LEVEL_UP][level_up] = True
+        self.level[level_up] += 1
+        self.time_remaining[level_up] = self.time_limit(self.level[level_up])
+        self.base_speed[level_up] = np.maximum(self.difficulty.speed_min,
+                                               self.base_speed[level_up] - self.difficulty.speed_step)
+        self.current_speed[level_up] = self.base_speed[level_up]
+        self.wrong_egg_penalty[solved] = False
+        self.penalty_timer[solved] = 0
+
+        decoy = idx[ate & ~is_target]
+        events[EVENT_DECOY][decoy] = True
+        self.lives[decoy] -= 1
+        dead = self.lives[decoy] <= 0
+        self._end(decoy[dead], NO_LIVES, events)
+        decoy = decoy[~dead]
+        self.wrong_egg_penalty[decoy] = True
+        self.penalty_timer[decoy] = PENALTY_SECONDS
+        self.current_speed[decoy] = self.base_speed[decoy] + 4
+
+        # Drop tails where nothing was eaten
+        moved = idx[~ate]
+        tail_ptr = (self.head_ptr[moved] - self.length[moved] + 1) % self.cells
+        self.occupied[moved, self.body[moved, tail_ptr]] = False
+        self.length[moved] -= 1
+
+        # New equations for solved boards, after the snake has moved
+        self.new_equations(solved)
+
+        return events
+
+    def snake(self, g):
+        """Return the body of game g as a list of (x, y) tuples, head first"""
+        length = int(self.length[g])
+        ptrs = (self.head_ptr[g] - np.arange(length)) % self.cells
+        return [(int(c) % self.width, int(c) // self.width) for c in self.body[g, ptrs]]
+
+
+def benchmark(num_games, ticks, seed=None):
+    """Step random actions across num_games boards, resetting finished games.
+
+    Returns game-ticks per second.
+    """
+    env = BatchSnakeEnv(num_games, seed=seed)
+    rng = np.random.default_rng(seed)
+    # Mostly keep going straight so games last longer than a few ticks
+    weights = [0.8, 0.05, 0.05, 0.05, 0.05]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        env.reset(env.game_over)
+        env.step(rng.choice(5, size=num_games, p=weights).astype(np.int8))
+    elapsed = time.perf_counter() - start
+    return num_games * ticks / elapsed
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rate = benchmark(games, count)
+    print(f"{games} games x {count} ticks: {rate:,.0f} game-ticks/s")
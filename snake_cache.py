@@ -0,0 +1,30 @@
+"""
+Math Snake on-disk cache
+Location and safe writes for generated data (equation bank, sounds).
+"""
+
+import os
+
+
+def cache_dir():
+    """Cache directory, from $MATH_SNAKE_CACHE or ~/.cache/math_snake; created on first use.
+
+    Raises OSError when it can't be created (e.g. a read-only home): callers
+    treat that like any other failed read or write and carry on without it.
+    """
+    path = os.environ.get('MATH_SNAKE_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'math_snake')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path(name):
+    """Full path of a file in the cache directory; raises OSError like cache_dir()"""
+    return os.path.join(cache_dir(), name)
+
+
+def write_atomic(path, data):
+    """Write bytes so readers never see a half-written file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
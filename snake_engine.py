@@ -0,0 +1,420 @@
+"""
+Math Snake headless game engine
+Pure-Python game state (snake, eggs, equation, lives, timer, level) with no
+pygame dependency, so the rules can be stepped at full speed without a window.
+"""
+
+import hashlib
+import random
+import sys
+import time
+from collections import deque
+
+from equation_bank import EquationSampler, load_bank
+
+# Default board size in grid cells (matches the 600x400 pygame game area)
+GRID_WIDTH = 30
+GRID_HEIGHT = 20
+
+# Directions
+STOP = (0, 0)
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+# Wire and file code of each direction (replays, snapshots, network input)
+DIRECTION_CODES = (STOP, UP, DOWN, LEFT, RIGHT)
+CODE_OF = {direction: code for code, direction in enumerate(DIRECTION_CODES)}
+
+# Speed is a divisor of this rate: at speed 8 the snake moves 60 / 8 = 7.5 times a second
+BASE_TICK_RATE = 60
+PENALTY_SECONDS = 2.0
+
+# Events reported by SnakeEngine.step()
+EVENT_TARGET = 'target'        # Ate a number from the equation
+EVENT_DECOY = 'decoy'          # Ate a wrong number and lost a life
+EVENT_SOLVED = 'solved'        # Collected every number of the equation
+EVENT_LEVEL_UP = 'level_up'    # Moved up a level
+EVENT_GAME_OVER = 'game_over'  # Game ended, see game_over_reason
+
+
+def generate_equation(level, rng=random):
+    """Generate a random math equation for a level (rules live in equation_bank)"""
+    return load_bank().sample(level, rng)
+
+
+def generate_decoys(numbers, count, rng=random):
+    """Pick distinct wrong numbers that do not appear in the equation"""
+    decoy_numbers = set()
+    # Widen the range when it could not hold enough distinct decoys
+    max_decoy_value = max(20, max(numbers) + 10, count + len(numbers))
+
+    while len(decoy_numbers) < count:
+        decoy_num = rng.randint(1, max_decoy_value)
+        if decoy_num not in numbers:
+            decoy_numbers.add(decoy_num)
+    return decoy_numbers
+
+
+class Egg:
+    """A numbered egg on the field"""
+    __slots__ = ('pos', 'number', 'is_target', 'collected')
+
+    def __init__(self, pos, number, is_target):
+        self.pos = pos
+        self.number = number
+        self.is_target = is_target
+        self.collected = False
+
+
+class Difficulty:
+    """Difficulty knobs; the defaults are the rules of the shipped game"""
+
+    def __init__(self, time_base=45, time_step=3, time_min=20, decoys_base=6, decoys_per_level=1,
+                 speed_start=8, speed_step=1, speed_min=4, equations_per_level=3):
+        self.time_base = time_base              # Seconds on the clock at level 0
+        self.time_step = time_step              # Seconds taken off per level
+        self.time_min = time_min
+        self.decoys_base = decoys_base          # Decoy eggs at level 0
+        self.decoys_per_level = decoys_per_level
+        self.speed_start = speed_start          # Starting speed divisor (lower is faster)
+        self.speed_step = speed_step            # Divisor taken off per level
+        self.speed_min = speed_min
+        self.equations_per_level = equations_per_level
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class SnakeEngine:
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, tick_rates=None, seed=None, recorder=None,
+                 difficulty=None):
+        self.width = width
+        self.height = height
+        self.tick_rates = tick_rates or {}  # Optional {speed: ticks per second} overrides
+        self.difficulty = difficulty or Difficulty()
+        self.events = []
+
+        # Every game gets its own RNG seed, drawn from this source so a
+        # seeded session is reproducible from game to game
+        self.seed_source = random.Random(seed)
+        self.recorder = recorder
+        self.reset_game()
+
+    def reset_game(self, seed=None):
+        """Reset game to initial state"""
+        if self.recorder is not None:
+            self.recorder.end_game(self)
+
+        self.seed = self.seed_source.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.equations = EquationSampler(load_bank(), self.rng)
+
+        self.eggs = []
+        self.egg_at = {}
+        self.place_snake([(self.width // 2, self.height // 2)])
+        self.direction = STOP
+        self.score = 0
+        self.level = 0
+        self.lives = 2  # Player gets 2 wrong eggs before game over
+        self.base_speed = self.difficulty.speed_start  # FPS divisor
+        self.current_speed = self.base_speed
+        self.wrong_egg_penalty = False
+        self.penalty_timer = 0
+        self.game_over = False
+        self.game_over_reason = None
+        self.paused = False
+        self.numbers_to_collect = []
+        self.collected_numbers = []
+        self.ticks = 0
+        self.eaten_egg = None  # Egg eaten on the last tick, if any
+
+        # Timer system
+        self.level_time_limit = self.get_time_limit_for_level(self.level)
+        self.time_remaining = self.level_time_limit
+        self.timer_running = False
+
+        self.generate_equation()
+        self.generate_eggs()
+
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+
+    def get_time_limit_for_level(self, level):
+        """Get time limit in seconds for each level"""
+        d = self.difficulty  # By default 45 seconds at level 0, 3 less per level, minimum 20
+        return max(d.time_min, d.time_base - (level * d.time_step))
+
+    def generate_equation(self):
+        """Generate a random math equation based on current level"""
+        self.current_equation = self.equations.sample(self.level)
+
+    def generate_eggs(self):
+        """Generate eggs with numbers on the field"""
+        # Cells of eggs left on the field become free again
+        for pos in self.egg_at:
+            self.release_cell(pos)
+
+        self.eggs = []
+        self.egg_at = {}  # Live (uncollected) eggs by position
+        self.numbers_to_collect = self.current_equation['numbers'].copy()
+        self.collected_numbers = []
+
+        # Add target number eggs (the ones we need to collect)
+        for target_num in self.numbers_to_collect:
+            pos = self.take_random_cell()
+            if pos is None:
+                break
+
+            egg = Egg(pos, target_num, True)
+            self.eggs.append(egg)
+            self.egg_at[pos] = egg
+
+        # Add decoy eggs (wrong numbers) - more decoys for higher levels
+        decoy_count = self.difficulty.decoys_base + self.difficulty.decoys_per_level * self.level
+        decoy_numbers = generate_decoys(self.numbers_to_collect, decoy_count, self.rng)
+
+        for decoy_num in decoy_numbers:
+            pos = self.take_random_cell()
+            if pos is None:
+                break
+
+            egg = Egg(pos, decoy_num, False)
+            self.eggs.append(egg)
+            self.egg_at[pos] = egg
+
+    def take_random_cell(self):
+        """Claim a random cell that has neither snake nor egg on it, or None if the board is full"""
+        if not self.free_cells:
+            return None
+        cell = self.free_cells[self.rng.randrange(len(self.free_cells))]
+        self.take_cell(cell)
+        return (cell % self.width, cell // self.width)
+
+    def take_cell(self, cell):
+        """Remove a cell from the free-cell index (swap with the last entry and pop)"""
+        slot = self.free_slot[cell]
+        last = self.free_cells.pop()
+        if last != cell:
+            self.free_cells[slot] = last
+            self.free_slot[last] = slot
+        self.free_slot[cell] = -1
+
+    def release_cell(self, pos):
+        """Return a cell to the free-cell index"""
+        cell = pos[1] * self.width + pos[0]
+        self.free_slot[cell] = len(self.free_cells)
+        self.free_cells.append(cell)
+
+    def place_snake(self, body):
+        """Replace the snake with the given cells, head first"""
+        self.snake = deque(body)
+        # One byte per grid cell, 1 where the snake is
+        self.occupied = bytearray(self.width * self.height)
+        for x, y in self.snake:
+            self.occupied[y * self.width + x] = 1
+
+        # Eggs under the new body are gone, as if eaten; otherwise their cells
+        # would later be released into the index while the snake is on them
+        covered = [pos for pos in self.egg_at if self.is_occupied(pos)]
+        if covered:
+            for pos in covered:
+                del self.egg_at[pos]
+            self.eggs = [egg for egg in self.eggs if egg.pos not in covered]
+
+        # Free-cell index: every cell without snake or egg, plus each cell's
+        # slot in that list (-1 when taken) so cells come and go in O(1)
+        taken = set(y * self.width + x for x, y in self.snake)
+        taken.update(y * self.width + x for x, y in self.egg_at)
+        self.free_cells = [cell for cell in range(self.width * self.height) if cell not in taken]
+        self.free_slot = [-1] * (self.width * self.height)
+        for slot, cell in enumerate(self.free_cells):
+            self.free_slot[cell] = slot
+
+    def check_free_cells(self):
+        """Raise AssertionError unless the free-cell index holds exactly the cells without snake or egg"""
+        width = self.width
+        expected = set(range(width * self.height))
+        expected.difference_update(y * width + x for x, y in self.snake)
+        expected.difference_update(y * width + x for x, y in self.egg_at)
+        assert len(self.free_cells) == len(set(self.free_cells)), "free-cell index has duplicates"
+        assert set(self.free_cells) == expected, "free-cell index out of step with the board"
+        assert all(self.free_slot[cell] == slot for slot, cell in enumerate(self.free_cells)), \
+            "free-cell slots out of step"
+
+    def is_occupied(self, pos):
+        """Check whether the snake covers a cell"""
+        return self.occupied[pos[1] * self.width + pos[0]] == 1
+
+    def tick_seconds(self):
+        """Length in seconds of the next logic tick at the current speed"""
+        rate = self.tick_rates.get(self.current_speed)
+        if rate:
+            return 1 / rate
+        return self.current_speed / BASE_TICK_RATE
+
+    def turn(self, direction):
+        """Change direction unless it would reverse the snake onto itself"""
+        if direction != (-self.direction[0], -self.direction[1]):
+            self.direction = direction
+
+    def step(self, action=None):
+        """Advance the game by one logic tick.
+
+        ``action`` is an optional new direction, applied with the same
+        no-reversal rule as the keyboard. Returns the list of EVENT_* values
+        produced during the tick.
+        """
+        self.events = []
+        if action is not None:
+            self.turn(action)
+
+        if self.game_over or self.paused or self.direction == STOP:
+            return self.events
+
+        if self.recorder is not None:
+            self.recorder.record(self)
+        self.ticks += 1
+        dt = self.tick_seconds()
+
+        # Start timer when player starts moving
+        if not self.timer_running:
+            self.timer_running = True
+
+        # Update timer
+        self.time_remaining -= dt
+        if self.time_remaining <= 0:
+            self.end_game("Time's up!")
+            return self.events
+
+        # Handle penalty timer
+        if self.wrong_egg_penalty:
+            self.penalty_timer -= dt
+            if self.penalty_timer <= 0:
+                self.wrong_egg_penalty = False
+                self.current_speed = self.base_speed
+
+        # Move snake
+        head_x, head_y = self.snake[0]
+        new_head = (head_x + self.direction[0], head_y + self.direction[1])
+
+        # Check wall collision
+        if (new_head[0] < 0 or new_head[0] >= self.width or
+            new_head[1] < 0 or new_head[1] >= self.height):
+            self.end_game("Hit the wall!")
+            return self.events
+
+        # Check self collision
+        head_cell = new_head[1] * self.width + new_head[0]
+        if self.occupied[head_cell]:
+            self.end_game("Hit yourself!")
+            return self.events
+
+        self.snake.appendleft(new_head)
+        self.occupied[head_cell] = 1
+        if self.free_slot[head_cell] >= 0:
+            self.take_cell(head_cell)
+
+        # Check egg collision
+        eaten_egg = self.egg_at.pop(new_head, None)
+        self.eaten_egg = eaten_egg
+
+        if eaten_egg:
+            if eaten_egg.is_target:
+                # Correct target number
+                self.events.append(EVENT_TARGET)
+                eaten_egg.collected = True
+                self.collected_numbers.append(eaten_egg.number)
+
+                # Check if all target numbers are collected
+                if len(self.collected_numbers) == len(self.numbers_to_collect):
+                    # All numbers collected - equation solved!
+                    self.score += 1
+                    self.events.append(EVENT_SOLVED)
+
+                    # Check for level up (every 3 equations solved by default)
+                    if self.score % self.difficulty.equations_per_level == 0:
+                        self.level += 1
+                        self.level_time_limit = self.get_time_limit_for_level(self.level)
+                        self.time_remaining = self.level_time_limit
+                        self.base_speed = max(self.difficulty.speed_min,
+                                              self.base_speed - self.difficulty.speed_step)
+                        self.current_speed = self.base_speed
+                        self.events.append(EVENT_LEVEL_UP)
+
+                    self.generate_equation()
+                    self.generate_eggs()
+
+                    # Reset penalty
+                    self.wrong_egg_penalty = False
+                    self.penalty_timer = 0
+
+            else:
+                # Wrong number (decoy) - LOSE A LIFE!
+                self.events.append(EVENT_DECOY)
+                self.lives -= 1
+                eaten_egg.collected = True  # Mark as collected to remove from field
+
+                # Check if game over (no lives left)
+                if self.lives <= 0:
+                    self.end_game("No lives left!")
+                    return self.events
+
+                self.wrong_egg_penalty = True
+                self.penalty_timer = PENALTY_SECONDS
+                self.current_speed = self.base_speed + 4  # Slow down
+        else:
+            # Remove tail if no egg eaten
+            tail = self.snake.pop()
+            self.occupied[tail[1] * self.width + tail[0]] = 0
+            self.release_cell(tail)
+
+        return self.events
+
+    def end_game(self, reason="Game Over"):
+        """End the game"""
+        self.game_over = True
+        self.game_over_reason = reason
+        self.events.append(EVENT_GAME_OVER)
+        if self.recorder is not None:
+            self.recorder.end_game(self)
+
+    def state_hash(self):
+        """Short digest of the game state, for checking that a replay matches"""
+        state = (
+            tuple(self.snake), self.direction, self.score, self.level, self.lives,
+            self.base_speed, self.current_speed, self.wrong_egg_penalty, self.penalty_timer,
+            self.time_remaining, self.game_over, self.game_over_reason, self.ticks,
+            self.current_equation['equation'], tuple(self.collected_numbers),
+            tuple(sorted((egg.pos, egg.number, egg.is_target) for egg in self.egg_at.values())),
+        )
+        return hashlib.blake2b(repr(state).encode(), digest_size=8).digest()
+
+
+def soak(ticks, seed=None, check=False):
+    """Play random moves headless for a number of ticks, restarting on game over.
+
+    check=True verifies the free-cell index after every tick (much slower).
+    Returns (ticks per second, games played).
+    """
+    rng = random.Random(seed)
+    engine = SnakeEngine(seed=seed)
+    games = 1
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if engine.game_over:
+            engine.reset_game()
+            games += 1
+        engine.step(rng.choice(DIRECTIONS))
+        if check:
+            engine.check_free_cells()
+    elapsed = time.perf_counter() - start
+    return ticks / elapsed, games
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--check"]
+    count = int(args[0]) if args else 100000
+    rate, games = soak(count, check="--check" in sys.argv)
+    print(f"{count} ticks over {games} games: {rate:,.0f} ticks/s")
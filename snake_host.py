@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Math Snake session host
+Runs thousands of independent single-player games on one machine, e.g. for a
+whole classroom or school. Sessions are sharded across worker processes by
+session id. Inside a worker a single timer wheel schedules every session's
+next logic tick at that session's own speed, so no session costs anything
+between its ticks and a sleeping shard wakes only when a tick is due or a
+command arrives.
+
+Players' views read sessions back as compact snapshots (snake_snapshot),
+which restore into a SnakeEngine on the reading side.
+
+    python snake_host.py --sessions-per-core 500 --seconds 30   # bot load test
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+import zlib
+from array import array
+from collections import defaultdict
+
+from snake_engine import SnakeEngine
+from snake_snapshot import SnapshotCodec
+from snake_tuner import make_agent
+
+WHEEL_RESOLUTION = 0.004   # Seconds per wheel slot; also the finest tick timing
+WHEEL_SLOTS = 512          # 2 s per turn of the wheel, longer than any tick
+MAX_LAG = 0.25             # A session further behind than this skips ticks instead of catching up
+BOT_AGENT = "greedy:0.05"
+
+
+def shard_of(session_id, shards):
+    """Shard that owns a session; stable across runs and processes"""
+    return zlib.crc32(str(session_id).encode()) % shards
+
+
+class TimerWheel:
+    """Hashed timer wheel.
+
+    Items are put in the slot for their due time; advance(now) walks the
+    slots passed since the last call and returns the items that are due.
+    Scheduling is O(1) and an advance only looks at the slots it passes.
+    Items due more than a turn ahead stay in their slot until their turn.
+    """
+
+    def __init__(self, resolution=WHEEL_RESOLUTION, slots=WHEEL_SLOTS, now=0.0):
+        self.resolution = resolution
+        self.slots = [[] for _ in range(slots)]
+        self.current = int(now / resolution)   # Last slot tick processed
+        self.count = 0
+
+    def schedule(self, due, item):
+        # Rounded up, so nothing fires before it is due
+        tick = max(math.ceil(due / self.resolution), self.current + 1)
+        self.slots[tick % len(self.slots)].append((tick, item))
+        self.count += 1
+
+    def advance(self, now):
+        """Items whose due time has passed, in due order"""
+        due = []
+        target = int(now / self.resolution)
+        slots = self.slots
+        while self.current < target:
+            self.current += 1
+            slot = slots[self.current % len(slots)]
+            if not slot:
+                continue
+            later = [entry for entry in slot if entry[0] > self.current]
+            if len(later) < len(slot):
+                due.extend(item for tick, item in slot if tick <= self.current)
+                slot[:] = later
+        self.count -= len(due)
+        return due
+
+    def next_time(self):
+        """When the earliest item falls due, or a turn from now if none does before then.
+
+        Walks forward from the current slot to the first one holding an item
+        due on this turn, so it is cheap when the wheel is busy and at most
+        one pass over the slots when it is nearly empty.
+        """
+        slots = self.slots
+        turn = len(slots)
+        if self.count:
+            for tick in range(self.current + 1, self.current + turn + 1):
+                slot = slots[tick % turn]
+                if slot and any(due == tick for due, _ in slot):
+                    return tick * self.resolution
+        return (self.current + turn) * self.resolution
+
+
+class Session:
+    """One game: engine state, the player's last input and when it next ticks"""
+    __slots__ = ('id', 'engine', 'agent', 'action', 'due', 'closed')
+
+    def __init__(self, session_id, seed=None, bot=False):
+        self.id = session_id
+        self.engine = SnakeEngine(seed=seed)
+        self.agent = make_agent(BOT_AGENT, random.Random(seed)) if bot else None
+        self.action = None
+        self.due = 0.0
+        self.closed = False
+
+
+class Shard:
+    """A worker process's sessions and scheduler"""
+
+    def __init__(self, index, conn, clock=time.perf_counter):
+        self.index = index
+        self.conn = conn
+        self.clock = clock
+        self.start = clock()
+        self.wheel = TimerWheel()
+        self.sessions = {}
+        self.starting = []   # Sessions created by the commands being handled
+        self.phase = random.Random(index)
+        self.codec = SnapshotCodec()
+        self.running = True
+
+        # Statistics since the last report
+        self.lags = array('d')
+        self.ticks = 0
+        self.skipped = 0
+        self.busy = 0.0
+        self.window_start = self.start
+
+    def now(self):
+        return self.clock() - self.start
+
+    def create(self, session_id, seed=None, bot=False):
+        if session_id in self.sessions:
+            return
+        session = Session(session_id, seed, bot)
+        if bot:
+            session.action = session.agent.act(session.engine)
+        self.sessions[session_id] = session
+        self.starting.append(session)
+
+    def start_sessions(self):
+        """Schedule new sessions' first ticks once their batch is in, at random phases so they don't tick in step"""
+        now = self.now()
+        for session in self.starting:
+            session.due = now + self.phase.random() * session.engine.tick_seconds()
+            self.wheel.schedule(session.due, session)
+        self.starting.clear()
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.closed = True  # Dropped when its wheel entry comes up
+
+    def state(self, session_id):
+        """Snapshot of a session's game (board, score, game over), or None if it doesn't exist"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        return self.codec.encode(session.engine, exact=False)
+
+    def tick(self, session, now):
+        engine = session.engine
+        lag = now - session.due
+        self.lags.append(lag)
+        self.ticks += 1
+
+        engine.step(session.action)
+        session.action = None
+        if session.agent is not None:
+            if engine.game_over:
+                engine.reset_game()
+            session.action = session.agent.act(engine)
+
+        # Fixed rate from the due time, so ticks don't drift with wheel granularity
+        if lag > MAX_LAG:
+            self.skipped += 1
+            session.due = now
+        session.due += engine.tick_seconds()
+        self.wheel.schedule(session.due, session)
+
+    def handle(self, commands):
+        for command, *args in commands:
+            if command == 'input':
+                session = self.sessions.get(args[0])
+                if session is not None:
+                    session.action = args[1]
+            elif command == 'create':
+                self.create(*args)
+            elif command == 'restart':
+                session = self.sessions.get(args[0])
+                if session is not None and session.engine.game_over:
+                    session.engine.reset_game()
+            elif command == 'close':
+                self.close(args[0])
+            elif command == 'state':
+                self.conn.send({session_id: self.state(session_id) for session_id in args[0]})
+            elif command == 'stats':
+                self.conn.send(self.report())
+            elif command == 'stop':
+                self.running = False
+
+    def report(self):
+        """Tick lag and load since the previous report"""
+        now = self.clock()
+        elapsed = now - self.window_start
+        lags = sorted(self.lags)
+        stats = {
+            'shard': self.index,
+            'sessions': len(self.sessions),
+            'ticks_per_second': self.ticks / elapsed if elapsed else 0.0,
+            'lag_mean_ms': 1000 * sum(lags) / len(lags) if lags else 0.0,
+            'lag_p99_ms': 1000 * lags[int(0.99 * (len(lags) - 1))] if lags else 0.0,
+            'lag_max_ms': 1000 * lags[-1] if lags else 0.0,
+            'skipped': self.skipped,
+            'busy': self.busy / elapsed if elapsed else 0.0,
+        }
+        self.lags = array('d')
+        self.ticks = self.skipped = 0
+        self.busy = 0.0
+        self.window_start = now
+        return stats
+
+    def run(self):
+        conn = self.conn
+        while self.running:
+            started = self.clock()
+            now = started - self.start
+            for session in self.wheel.advance(now):
+                if not session.closed:
+                    self.tick(session, now)
+            while conn.poll():
+                self.handle(conn.recv())
+            self.start_sessions()
+            finished = self.clock()
+            self.busy += finished - started
+
+            # Sleep until a session is due, waking early for commands
+            timeout = self.wheel.next_time() - (finished - self.start)
+            if timeout > 0 and conn.poll(timeout):
+                self.handle(conn.recv())
+                self.start_sessions()
+
+
+def run_shard(index, conn):
+    """Worker process entry point"""
+    try:
+        Shard(index, conn).run()
+    except (KeyboardInterrupt, EOFError):
+        pass
+
+
+class SessionHost:
+    """Front end to the shard processes.
+
+    Commands for a session go to the shard that owns its id. Each message on
+    a pipe is a list of commands, so bulk operations cost one send per shard.
+    """
+
+    def __init__(self, shards=None):
+        self.shard_count = shards or os.cpu_count() or 1
+        self.conns = []
+        self.processes = []
+        for index in range(self.shard_count):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_shard, args=(index, child), daemon=True)
+            process.start()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def send(self, session_id, *command):
+        self.conns[shard_of(session_id, self.shard_count)].send([command])
+
+    def create(self, session_id, seed=None, bot=False):
+        self.send(session_id, 'create', session_id, seed, bot)
+
+    def create_many(self, session_ids, bot=False):
+        """Create sessions with one message per shard"""
+        batches = defaultdict(list)
+        for session_id in session_ids:
+            batches[shard_of(session_id, self.shard_count)].append(('create', session_id, None, bot))
+        for shard, batch in batches.items():
+            self.conns[shard].send(batch)
+
+    def input(self, session_id, direction):
+        self.send(session_id, 'input', session_id, direction)
+
+    def restart(self, session_id):
+        self.send(session_id, 'restart', session_id)
+
+    def close(self, session_id):
+        self.send(session_id, 'close', session_id)
+
+    def states(self, session_ids):
+        """{session id: snapshot bytes or None}, asking each owning shard once.
+
+        Restore a snapshot into a SnakeEngine() with snake_snapshot.restore()
+        to read the board, score and whether the game is over.
+        """
+        batches = defaultdict(list)
+        for session_id in session_ids:
+            batches[shard_of(session_id, self.shard_count)].append(session_id)
+        for shard, batch in batches.items():
+            self.conns[shard].send([('state', batch)])
+        states = {}
+        for shard in batches:
+            states.update(self.conns[shard].recv())
+        return states
+
+    def state(self, session_id):
+        """Snapshot of one session's game, or None if there is no such session"""
+        return self.states([session_id])[session_id]
+
+    def stats(self):
+        """One report per shard"""
+        for conn in self.conns:
+            conn.send([('stats',)])
+        return [conn.recv() for conn in self.conns]
+
+    def stop(self):
+        for conn in self.conns:
+            conn.send([('stop',)])
+        for process in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+
+
+def print_stats(stats):
+    print(f"{'shard':>5} {'sessions':>9} {'ticks/s':>9} {'lag mean':>9} {'p99':>8} {'max':>8} {'skipped':>8} {'busy':>6}")
+    for s in stats:
+        print(f"{s['shard']:>5} {s['sessions']:>9} {s['ticks_per_second']:>9.0f} {s['lag_mean_ms']:>7.2f}ms "
+              f"{s['lag_p99_ms']:>6.2f}ms {s['lag_max_ms']:>6.2f}ms {s['skipped']:>8} {s['busy']:>6.0%}")
+    total = sum(s['ticks_per_second'] for s in stats)
+    print(f"total {sum(s['sessions'] for s in stats)} sessions, {total:,.0f} ticks/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Math Snake sessions (bot load test)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--sessions-per-core", type=int, default=250,
+                        help="bot sessions per shard")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--report", type=float, default=5.0,
+                        help="seconds between reports")
+    args = parser.parse_args()
+
+    host = SessionHost(args.shards)
+    sessions = args.sessions_per_core * host.shard_count
+    print(f"{host.shard_count} shards, {sessions} bot sessions")
+    host.create_many(range(sessions), bot=True)
+    try:
+        end = time.perf_counter() + args.seconds
+        while time.perf_counter() < end:
+            time.sleep(min(args.report, max(0.0, end - time.perf_counter())))
+            print_stats(host.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.stop()
+
+
+if __name__ == "__main__":
+    main()
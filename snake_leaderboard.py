@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Math Snake leaderboard
+Finished games are kept in a local SQLite database in the cache directory,
+for all-time top scores and each player's history. The game never waits on
+the database: record() queues the result for a writer thread that inserts in
+batches, and updates an in-memory cache of top scores that the game-over
+screen reads. The writer fills that cache from the database once at start.
+
+    python snake_leaderboard.py               # print the leaderboard
+    python snake_leaderboard.py --player Ada  # ... and Ada's recent games
+"""
+
+import argparse
+import bisect
+import queue
+import sqlite3
+import threading
+import time
+
+from snake_cache import cache_path
+
+DB_NAME = "leaderboard.sqlite3"
+TOP_N = 10            # Entries cached per list
+BATCH_SIZE = 64       # Rows per insert transaction at most
+BATCH_SECONDS = 0.5   # How long a result waits for others to share its transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL,      -- start time of the run the game was played in
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    reason TEXT,
+    ticks INTEGER NOT NULL,
+    seed INTEGER,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC, level DESC, finished_at);
+CREATE INDEX IF NOT EXISTS games_by_level ON games (level, score DESC, finished_at);
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player, score DESC, finished_at);
+CREATE INDEX IF NOT EXISTS history_by_player ON games (player, finished_at DESC);
+"""
+
+INSERT = ("INSERT INTO games (session, player, score, level, reason, ticks, seed, finished_at) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+ENTRY = "score, level, player, finished_at"
+ORDER = "ORDER BY score DESC, level DESC, finished_at LIMIT ?"
+
+# Cache lists
+ALL = ('all',)
+
+
+def by_level(level):
+    return ('level', level)
+
+
+def by_player(player):
+    return ('player', player)
+
+
+def entry_key(entry):
+    """Best first: higher score, then higher level, then whoever got there first"""
+    score, level, _, finished_at = entry
+    return (-score, -level, finished_at)
+
+
+def connect(path=None):
+    db = sqlite3.connect(path or cache_path(DB_NAME))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+class Leaderboard:
+    """Off-thread SQLite leaderboard with a cached top N.
+
+    Entries are (score, level, player, finished_at) tuples. All public
+    methods are safe to call from the frame loop: none of them touch disk.
+    """
+
+    def __init__(self, player="player", path=None, top_n=TOP_N):
+        self.player = player
+        self.path = path
+        self.top_n = top_n
+        self.session = int(time.time())
+
+        self.lock = threading.Lock()
+        self.lists = {}          # ALL / by_level(n) / by_player(name) -> [(key, entry)] best first
+        self.games_played = 0    # By this player, all time
+        self.version = 0         # Bumped on every cache change, so screens know to redraw
+        self.loaded = False
+
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.batches = 0
+        self.thread = threading.Thread(target=self.writer, name="leaderboard", daemon=True)
+        self.thread.start()
+
+    def add(self, name, entry):
+        """Insert into a cached list; returns the 1-based position, or None if it did not make the list"""
+        entries = self.lists.setdefault(name, [])
+        item = (entry_key(entry), entry)
+        position = bisect.bisect_right(entries, item)
+        if position >= self.top_n:
+            return None
+        entries.insert(position, item)
+        del entries[self.top_n:]
+        return position + 1
+
+    def record(self, engine):
+        """Store a finished game; returns its entry, for rank()"""
+        finished_at = time.time()
+        self.queue.put((self.session, self.player, engine.score, engine.level, engine.game_over_reason,
+                        engine.ticks, engine.seed, finished_at))
+        entry = (engine.score, engine.level, self.player, finished_at)
+        with self.lock:
+            self.add(ALL, entry)
+            self.add(by_level(engine.level), entry)
+            self.add(by_player(self.player), entry)
+            self.games_played += 1
+            self.version += 1
+        return entry
+
+    def rank(self, entry, name=ALL):
+        """1-based position of an entry in a cached list, or None if it isn't there.
+
+        Always None until the database has been loaded: before that the cache
+        only holds this session's games, which would rank anything first.
+        """
+        with self.lock:
+            if not self.loaded:
+                return None
+            for position, (_, cached) in enumerate(self.lists.get(name, ()), 1):
+                if cached == entry:
+                    return position
+        return None
+
+    def top(self, name=ALL, count=None):
+        """Cached entries of a list, best first"""
+        with self.lock:
+            return [entry for _, entry in self.lists.get(name, ())[:count]]
+
+    def writer(self):
+        """Writer thread: load the cache, then insert queued results in batches"""
+        try:
+            db = connect(self.path)
+            self.load(db)
+        except (sqlite3.Error, OSError) as e:   # OSError: no cache directory
+            print(f"Leaderboard unavailable ({e}), scores will not be saved")
+            db = None
+
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_SECONDS
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            rows = [row for row in batch if row is not None]
+            if rows and db is not None:
+                try:
+                    with db:
+                        db.executemany(INSERT, rows)
+                    self.written += len(rows)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    print(f"Leaderboard write failed ({e})")
+        if db is not None:
+            db.close()
+
+    def load(self, db):
+        """Fill the cache from the database, merging with anything recorded meanwhile"""
+        lists = {ALL: db.execute(f"SELECT {ENTRY} FROM games {ORDER}", (self.top_n,)).fetchall()}
+        for level, in db.execute("SELECT DISTINCT level FROM games").fetchall():
+            lists[by_level(level)] = db.execute(
+                f"SELECT {ENTRY} FROM games WHERE level = ? {ORDER}", (level, self.top_n)).fetchall()
+        lists[by_player(self.player)] = db.execute(
+            f"SELECT {ENTRY} FROM games WHERE player = ? {ORDER}", (self.player, self.top_n)).fetchall()
+        played, = db.execute("SELECT COUNT(*) FROM games WHERE player = ?", (self.player,)).fetchone()
+
+        # Results recorded before this ran are still queued behind it, so nothing is counted twice
+        with self.lock:
+            for name, entries in lists.items():
+                for entry in entries:
+                    self.add(name, entry)
+            self.games_played += played
+            self.loaded = True
+            self.version += 1
+
+    def close(self, timeout=5.0):
+        """Write out everything queued and stop the writer"""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the Math Snake leaderboard")
+    parser.add_argument("--player", help="also show this player's recent games")
+    parser.add_argument("--top", type=int, default=TOP_N)
+    args = parser.parse_args()
+
+    db = connect()
+    print("All-time top scores:")
+    for i, (score, level, player, finished_at) in enumerate(
+            db.execute(f"SELECT {ENTRY} FROM games {ORDER}", (args.top,)), 1):
+        print(f"{i:>3}. {player:<16} {score:>5}  level {level:<3} {time.strftime('%Y-%m-%d', time.localtime(finished_at))}")
+    if args.player:
+        print(f"\nRecent games by {args.player}:")
+        for score, level, reason, finished_at in db.execute(
+                "SELECT score, level, reason, finished_at FROM games WHERE player = ? "
+                "ORDER BY finished_at DESC LIMIT ?", (args.player, args.top)):
+            print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(finished_at))}  "
+                  f"score {score:>4}  level {level:<3} {reason or ''}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
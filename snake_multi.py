@@ -0,0 +1,241 @@
+"""
+Math Snake multiplayer rules
+Several snakes race for the eggs of one shared equation on one board. Built
+on SnakeEngine's board bookkeeping (occupancy grid, free-cell index, egg
+index, equation bank); every tick also records what changed so the server
+can send deltas instead of whole boards.
+"""
+
+import random
+from collections import Counter, deque
+
+from equation_bank import EquationSampler, load_bank
+from snake_engine import SnakeEngine, STOP
+
+MAX_PLAYERS = 64
+START_LIVES = 2
+
+
+class Player:
+    """One snake and its owner's standing"""
+    __slots__ = ('id', 'name', 'snake', 'direction', 'score', 'lives', 'alive')
+
+    def __init__(self, player_id, name):
+        self.id = player_id
+        self.name = name
+        self.snake = deque()
+        self.direction = STOP
+        self.score = 0
+        self.lives = START_LIVES
+        self.alive = False
+
+
+class Delta:
+    """Changes made since the last clear(), in the order a client has to apply them"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.reset = False         # New round: drop everything and start from this delta
+        self.joined = []           # (player id, name)
+        self.left = []             # player ids
+        self.removed = []          # Snakes taken off the board (died or left)
+        self.spawned = []          # (player id, cells head first)
+        self.moves = []            # (player id, new head, grew)
+        self.stats = set()         # Players whose score or lives changed
+        self.eggs_reset = False    # All eggs replaced
+        self.eggs_gone = []        # positions
+        self.eggs_new = []         # (position, number)
+        self.equation = False      # Equation replaced (collected numbers restart)
+        self.collected = []        # Numbers collected this tick
+        self.round = False         # Round number, level or game over changed
+
+
+class MultiplayerEngine(SnakeEngine):
+    """Authoritative multiplayer game.
+
+    Every live snake with a direction moves one cell per step(); the server
+    sets directions with turn_player() between steps. Snakes die on walls,
+    bodies (their own or others') and head-on meetings. A number of the
+    equation counts for whoever eats it; a decoy costs the eater a life.
+    When the equation is complete everyone gets a new one. The round ends
+    once every snake is dead. There is no level timer and the tick rate is
+    the server's.
+    """
+
+    def __init__(self, width=40, height=30, seed=None, difficulty=None):
+        self.players = {}
+        self.delta = Delta()
+        self.round = 0
+        super().__init__(width, height, seed=seed, difficulty=difficulty)
+
+    def reset_game(self, seed=None):
+        """Start a new round with every connected player respawned"""
+        self.seed = self.seed_source.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.equations = EquationSampler(load_bank(), self.rng)
+
+        self.eggs = []
+        self.egg_at = {}
+        self.place_snake([])
+        self.level = 0
+        self.solved = 0
+        self.ticks = 0
+        self.game_over = False
+        self.game_over_reason = None
+        self.round += 1
+
+        self.delta.clear()
+        self.delta.reset = True
+        for player in self.players.values():
+            player.score = 0
+            player.lives = START_LIVES
+            player.snake = deque()
+            self.spawn(player)
+
+        self.generate_equation()
+        self.generate_eggs()
+        self.delta.equation = True
+        self.delta.round = True
+
+    def generate_eggs(self):
+        super().generate_eggs()
+        self.delta.eggs_reset = True
+        self.delta.eggs_gone = []
+        self.delta.eggs_new = [(pos, egg.number) for pos, egg in self.egg_at.items()]
+
+    def add_player(self, name):
+        """Add a player; they start playing straight away unless the round is over"""
+        player_id = next(i for i in range(1, MAX_PLAYERS + 2) if i not in self.players)
+        if player_id > MAX_PLAYERS:
+            return None
+        player = Player(player_id, name)
+        self.players[player_id] = player
+        self.delta.joined.append((player_id, name))
+        self.delta.stats.add(player_id)
+        if not self.game_over:
+            self.spawn(player)
+        return player
+
+    def remove_player(self, player_id):
+        player = self.players.pop(player_id, None)
+        if player is None:
+            return
+        if player.alive:
+            self.clear_snake(player)
+        self.delta.left.append(player_id)
+        self.check_round_over()
+
+    def spawn(self, player):
+        """Put a one-cell snake on a random free cell"""
+        pos = self.take_random_cell()
+        if pos is None:
+            return
+        self.occupied[pos[1] * self.width + pos[0]] = 1
+        player.snake = deque([pos])
+        player.direction = STOP
+        player.alive = True
+        self.delta.spawned.append((player.id, [pos]))
+        self.delta.stats.add(player.id)
+
+    def clear_snake(self, player):
+        """Take a snake off the board"""
+        for x, y in player.snake:
+            self.occupied[y * self.width + x] = 0
+            self.release_cell((x, y))
+        player.snake = deque()
+        player.alive = False
+        self.delta.removed.append(player.id)
+
+    def turn_player(self, player_id, direction):
+        """Change a player's direction unless it would reverse the snake onto itself"""
+        player = self.players.get(player_id)
+        if player is not None and player.alive and direction != (-player.direction[0], -player.direction[1]):
+            player.direction = direction
+
+    def step(self, action=None):
+        """Move every live snake one cell; returns nothing, see self.delta"""
+        if self.game_over:
+            return
+        self.ticks += 1
+        width, height = self.width, self.height
+        occupied = self.occupied
+
+        moving = [p for p in self.players.values() if p.alive and p.direction != STOP]
+        heads = {}
+        moved_from = {}   # Old head cell -> player id
+        for player in moving:
+            x, y = player.snake[0]
+            heads[player.id] = (x + player.direction[0], y + player.direction[1])
+            moved_from[(x, y)] = player.id
+
+        # Two heads moving into each other's cells meet head-on even though
+        # the cells are free once short snakes' tails have moved out
+        swapped = set()
+        for player in moving:
+            other = moved_from.get(heads[player.id])
+            if other is not None and other != player.id and moved_from.get(heads[other]) == player.id:
+                swapped.add(player.id)
+
+        # Tails move out first, so a snake may follow a tail into its cell
+        for player in moving:
+            if heads[player.id] not in self.egg_at:
+                x, y = player.snake.pop()
+                occupied[y * width + x] = 0
+                self.release_cell((x, y))
+
+        crowded = Counter(heads.values())
+        dead = []
+        for player in moving:
+            x, y = head = heads[player.id]
+            if (not (0 <= x < width and 0 <= y < height) or occupied[y * width + x] or crowded[head] > 1
+                    or player.id in swapped):
+                dead.append(player)
+                continue
+            player.snake.appendleft(head)
+            cell = y * width + x
+            occupied[cell] = 1
+            if self.free_slot[cell] != -1:
+                self.take_cell(cell)
+            self.delta.moves.append((player.id, head, head in self.egg_at))
+
+        solved = False
+        for player in moving:
+            if player in dead:
+                continue
+            egg = self.egg_at.pop(player.snake[0], None)
+            if egg is None:
+                continue
+            self.delta.eggs_gone.append(egg.pos)
+            self.delta.stats.add(player.id)
+            if egg.is_target:
+                player.score += 1
+                self.collected_numbers.append(egg.number)
+                self.delta.collected.append(egg.number)
+                if len(self.collected_numbers) >= len(self.numbers_to_collect):
+                    solved = True
+            else:
+                player.lives -= 1
+                if player.lives <= 0:
+                    dead.append(player)
+
+        for player in dead:
+            self.clear_snake(player)
+
+        if solved:
+            self.solved += 1
+            if self.solved % self.difficulty.equations_per_level == 0:
+                self.level += 1
+                self.delta.round = True
+            self.generate_equation()
+            self.generate_eggs()
+            self.delta.equation = True
+
+        self.check_round_over()
+
+    def check_round_over(self):
+        if self.players and not self.game_over and not any(p.alive for p in self.players.values()):
+            self.game_over = True
+            self.game_over_reason = "Everyone is out!"
+            self.delta.round = True
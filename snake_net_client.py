@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Math Snake network client
+pygame frontend for snake_server.py. The board comes from the server's state
+deltas; your own turns are shown at once (client-side prediction) and
+corrected when the server's state arrives.
+
+    python snake_net_client.py --host 127.0.0.1 --port 8765 --name Ada
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import deque
+
+import pygame
+
+from math_snake_pygame import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, GAME_WIDTH, GAME_HEIGHT, GRID_SIZE, VIEW_WIDTH, VIEW_HEIGHT,
+    BLACK, WHITE, GREEN, LIGHT_GREEN, RED, BLUE, ORANGE, GRAY, DARK_GRAY, LIGHT_GRAY,
+)
+from snake_engine import STOP, UP, DOWN, LEFT, RIGHT
+from snake_protocol import (
+    MSG_HELLO, MSG_WELCOME, MSG_STATE, MSG_INPUT, WELCOME, INPUT, CODE_OF, ClientState, TcpTransport,
+)
+from snake_render import BoardSprites, TextCache
+
+KEYS = {pygame.K_UP: UP, pygame.K_DOWN: DOWN, pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
+SCOREBOARD_ROWS = 6
+
+
+class NetworkGame:
+    """Draws the server's board and sends the player's turns"""
+
+    def __init__(self, name, fps_limit=60):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("Math Snake Game - Multiplayer")
+        self.name = name
+        self.fps_limit = fps_limit
+
+        self.game_rect = pygame.Rect(100, 150, GAME_WIDTH, GAME_HEIGHT)
+        self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.background.fill(DARK_GRAY)
+        pygame.draw.rect(self.background, LIGHT_GRAY, self.game_rect)
+        pygame.draw.rect(self.background, BLACK, self.game_rect, 2)
+
+        self.font_large = pygame.font.Font(None, 36)
+        self.font_medium = pygame.font.Font(None, 24)
+        self.font_small = pygame.font.Font(None, 18)
+        self.text_cache = TextCache()
+        # The single-player game's sprites; egg numbers are rendered as they appear
+        self.sprites = BoardSprites(GRID_SIZE, self.font_small, (LIGHT_GREEN, GREEN, RED, ORANGE),
+                                    BLUE, BLACK, WHITE)
+
+        self.state = ClientState()
+        self.player_id = None
+        self.width = self.height = 0
+        self.tick_rate = 10.0
+        self.state_time = time.perf_counter()   # When the last state arrived
+        self.camera = (0, 0)
+
+        # Prediction: turns sent but not yet applied by the server
+        self.sequence = 0
+        self.pending = deque()          # (sequence, direction, time sent)
+        self.direction = STOP           # Direction the snake is shown moving in
+        self.latency = deque(maxlen=50)  # Input round trips in seconds
+        self.bytes_received = 0
+
+    def own_snake(self):
+        player = self.state.players.get(self.player_id)
+        return player.snake if player is not None else ()
+
+    def moving_direction(self):
+        """Direction the server last moved our snake in, from its first two cells"""
+        snake = self.own_snake()
+        if len(snake) < 2:
+            return self.direction
+        return (snake[0][0] - snake[1][0], snake[0][1] - snake[1][1])
+
+    def on_state(self, message):
+        self.state.apply(message)
+        self.state_time = time.perf_counter()
+        while self.pending and self.pending[0][0] <= self.state.ack:
+            _, _, sent = self.pending.popleft()
+            self.latency.append(self.state_time - sent)
+        if not self.pending:
+            # Everything we sent has been applied: trust the server's movement
+            self.direction = self.moving_direction()
+        if not self.own_snake():
+            self.direction = STOP
+
+    async def receive(self, transport):
+        while True:
+            message = await transport.read()
+            self.bytes_received += len(message)
+            if message[0] == MSG_WELCOME:
+                _, self.player_id, self.width, self.height, self.tick_rate = WELCOME.unpack(message)
+            elif message[0] == MSG_STATE:
+                self.on_state(message)
+
+    def handle_events(self, transport):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                direction = KEYS.get(event.key)
+                if direction is None or not self.own_snake():
+                    continue
+                # Predict: no reversal against what is on screen, shown straight away
+                if direction != (-self.direction[0], -self.direction[1]) and direction != self.direction:
+                    self.sequence += 1
+                    self.pending.append((self.sequence, direction, time.perf_counter()))
+                    self.direction = direction
+                    transport.send(INPUT.pack(MSG_INPUT, self.sequence, CODE_OF[direction]))
+        return True
+
+    def update_camera(self, head):
+        cx = min(max(0, head[0] - VIEW_WIDTH // 2), max(0, self.width - VIEW_WIDTH))
+        cy = min(max(0, head[1] - VIEW_HEIGHT // 2), max(0, self.height - VIEW_HEIGHT))
+        self.camera = (cx, cy)
+
+    def text(self, font, text, color, **position):
+        surface = self.text_cache.render(font, text, color)
+        self.screen.blit(surface, surface.get_rect(**position))
+
+    def draw(self):
+        state = self.state
+        self.screen.blit(self.background, (0, 0))
+
+        snake = self.own_snake()
+        if snake:
+            self.update_camera(snake[0])
+        cx, cy = self.camera
+        left, top = 100 - cx * GRID_SIZE, 150 - cy * GRID_SIZE
+
+        def visible(pos):
+            return cx <= pos[0] < cx + VIEW_WIDTH and cy <= pos[1] < cy + VIEW_HEIGHT
+
+        # (position, atlas area); egg sprites may grow the atlas, so its surface is fetched last
+        areas = self.sprites.atlas.areas
+        sprites = [((left + pos[0] * GRID_SIZE, top + pos[1] * GRID_SIZE), self.sprites.egg_area(number))
+                   for pos, number in state.eggs.items() if visible(pos)]
+
+        alpha = min(1.0, (time.perf_counter() - self.state_time) * self.tick_rate)
+        for player in state.players.values():
+            if not player.snake:
+                continue
+            own = player.id == self.player_id
+            body = areas[('segment', GREEN if own else ORANGE)]
+            sprites.extend(((left + x * GRID_SIZE, top + y * GRID_SIZE), body)
+                           for x, y in list(player.snake)[1:] if visible((x, y)))
+            head = player.snake[0]
+            if visible(head):
+                dest = (left + head[0] * GRID_SIZE, top + head[1] * GRID_SIZE)
+                if own and not state.game_over:
+                    # Prediction: slide the head toward where our latest turn takes it
+                    offset = int(alpha * GRID_SIZE)
+                    dest = (dest[0] + self.direction[0] * offset, dest[1] + self.direction[1] * offset)
+                sprites.append((dest, areas[('segment', LIGHT_GREEN if own else RED)]))
+        atlas = self.sprites.atlas.surface
+        self.screen.blits([(atlas, dest, area) for dest, area in sprites], doreturn=False)
+
+        # HUD
+        self.text(self.font_large, state.equation, BLUE, center=(WINDOW_WIDTH // 2, 50))
+        self.text(self.font_medium, f"Round {state.round}  Level {state.level}", WHITE, topleft=(20, 20))
+        remaining = list(state.numbers)
+        for number in state.collected:
+            if number in remaining:
+                remaining.remove(number)
+        if remaining:
+            self.text(self.font_small, f"Still need: {', '.join(map(str, remaining))}", BLUE, topleft=(20, 120))
+
+        ranked = sorted(state.players.values(), key=lambda p: -p.score)[:SCOREBOARD_ROWS]
+        for i, player in enumerate(ranked):
+            color = LIGHT_GREEN if player.id == self.player_id else WHITE if player.snake else GRAY
+            self.text(self.font_small, f"{player.name}: {player.score}  ({player.lives} lives)", color,
+                      topright=(WINDOW_WIDTH - 20, 20 + i * 16))
+
+        ping = sum(self.latency) / len(self.latency) * 1000 if self.latency else 0
+        self.text(self.font_small, f"input {ping:.0f} ms", GRAY, topleft=(20, WINDOW_HEIGHT - 30))
+        if state.game_over:
+            self.text(self.font_large, "Round over - next one starts soon", RED,
+                      center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
+        elif not snake:
+            self.text(self.font_medium, "Out! Watching until the next round", ORANGE,
+                      center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
+        pygame.display.flip()
+
+    async def run(self, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        transport = TcpTransport(reader, writer)
+        transport.send(bytes((MSG_HELLO,)) + self.name.encode())
+        receiver = asyncio.create_task(self.receive(transport))
+
+        frame_seconds = 1 / self.fps_limit if self.fps_limit else 0
+        try:
+            while not receiver.done():
+                start = time.perf_counter()
+                if not self.handle_events(transport):
+                    break
+                self.draw()
+                await writer.drain()
+                await asyncio.sleep(max(0.0, frame_seconds - (time.perf_counter() - start)))
+        finally:
+            receiver.cancel()
+            writer.close()
+            pygame.quit()
+        if receiver.done() and not receiver.cancelled() and receiver.exception():
+            print(f"Disconnected: {receiver.exception()!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Snake multiplayer client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--name", default="player")
+    args = parser.parse_args()
+    try:
+        asyncio.run(NetworkGame(args.name).run(args.host, args.port))
+    except (ConnectionError, OSError) as e:
+        print(f"Could not connect to {args.host}:{args.port} ({e})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Math Snake frame profiler
+Opt-in per-frame timings of the main loop phases, with rolling percentiles
+for an on-screen overlay and a trace file that opens in chrome://tracing.
+"""
+
+import json
+import time
+from array import array
+from collections import deque
+
+PHASES = ('events', 'update', 'draw', 'tick')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Records how long each phase of every frame takes.
+
+    The loop calls begin_frame(), then mark(phase) after each phase in PHASES
+    order, then end_frame(). Only perf_counter() calls and array appends
+    happen per frame; percentiles are worked out every refresh_frames frames.
+    """
+
+    def __init__(self, target_fps=60, window=600, refresh_frames=30, trace_frames=100000,
+                 clock=time.perf_counter):
+        self.frame_budget = 1 / target_fps
+        self.refresh_frames = refresh_frames
+        self.trace_frames = trace_frames
+        self.clock = clock
+        self.visible = False
+
+        # Rolling windows of recent durations in seconds
+        self.recent = {phase: deque(maxlen=window) for phase in PHASES}
+        self.recent_frames = deque(maxlen=window)
+
+        # Raw trace: frame start time followed by one duration per phase
+        self.trace = array('d')
+        self.frames = 0
+        self.dropped_frames = 0
+        self.lines = []
+
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.durations = []
+
+    def begin_frame(self):
+        now = self.clock()
+        self.frame_start = now
+        self.last_mark = now
+        self.durations = []
+
+    def mark(self, phase):
+        """Close the current phase; phases must be marked in PHASES order"""
+        now = self.clock()
+        duration = now - self.last_mark
+        self.recent[phase].append(duration)
+        self.durations.append(duration)
+        self.last_mark = now
+
+    def end_frame(self):
+        total = self.last_mark - self.frame_start
+        self.recent_frames.append(total)
+        # Dropped: the frame took long enough to miss at least one display refresh
+        if total > self.frame_budget * 1.5:
+            self.dropped_frames += 1
+        if self.frames < self.trace_frames:
+            self.trace.append(self.frame_start)
+            self.trace.extend(self.durations)
+        self.frames += 1
+        if self.frames % self.refresh_frames == 0:
+            self.lines = self.summary()
+
+    def toggle(self):
+        """Show or hide the overlay"""
+        self.visible = not self.visible
+        if self.visible:
+            self.lines = self.summary()
+
+    def stats(self, phase=None):
+        """p50/p95/p99 in milliseconds over the rolling window, for one phase or whole frames"""
+        values = sorted(self.recent_frames if phase is None else self.recent[phase])
+        return tuple(percentile(values, fraction) * 1000 for fraction in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        """Overlay text lines"""
+        p50, p95, p99 = self.stats()
+        fps = 1000 / p50 if p50 else 0
+        lines = [f"frame {p50:.1f}/{p95:.1f}/{p99:.1f} ms  ~{fps:.0f} FPS  dropped {self.dropped_frames}"]
+        for phase in PHASES:
+            p50, p95, p99 = self.stats(phase)
+            lines.append(f"{phase} {p50:.2f}/{p95:.2f}/{p99:.2f} ms")
+        return lines
+
+    def dump_trace(self, path):
+        """Write recorded frames in Chrome trace event format"""
+        stride = 1 + len(PHASES)
+        events = []
+        origin = self.trace[0] if self.trace else 0.0
+        for i in range(0, len(self.trace) - stride + 1, stride):
+            start = self.trace[i]
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': (start - origin) * 1e6,
+                           'dur': sum(self.trace[i + 1:i + stride]) * 1e6})
+            for phase, duration in zip(PHASES, self.trace[i + 1:i + stride]):
+                events.append({'name': phase, 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': (start - origin) * 1e6, 'dur': duration * 1e6})
+                start += duration
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'frames': self.frames, 'dropped_frames': self.dropped_frames}}, f)
+
+
+class InputLatency:
+    """How long key presses take to reach the board.
+
+    applied(pressed) is called after the logic tick that used an input,
+    displayed() after each frame is presented; both take perf_counter()
+    times. Press times are taken when the game reads the event, so time the
+    event spent queued in SDL before that is not counted.
+    """
+
+    def __init__(self, window=200, clock=time.perf_counter):
+        self.clock = clock
+        self.to_update = deque(maxlen=window)
+        self.to_display = deque(maxlen=window)
+        self.unshown = []    # Press times of applied inputs not on screen yet
+        self.inputs = 0
+        self.discarded = 0   # Presses that could not be queued
+
+    def applied(self, pressed):
+        self.to_update.append(self.clock() - pressed)
+        self.unshown.append(pressed)
+        self.inputs += 1
+
+    def displayed(self):
+        if self.unshown:
+            now = self.clock()
+            self.to_display.extend(now - pressed for pressed in self.unshown)
+            self.unshown.clear()
+
+    def stats(self, samples):
+        """p50/p95/max in milliseconds"""
+        values = sorted(samples)
+        return (percentile(values, 0.50) * 1000, percentile(values, 0.95) * 1000,
+                values[-1] * 1000 if values else 0.0)
+
+    def summary(self):
+        lines = []
+        for name, samples in (("input>update", self.to_update), ("input>display", self.to_display)):
+            p50, p95, worst = self.stats(samples)
+            lines.append(f"{name} {p50:.1f}/{p95:.1f}/{worst:.1f} ms")
+        lines.append(f"inputs {self.inputs}  discarded {self.discarded}")
+        return lines
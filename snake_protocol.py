@@ -0,0 +1,327 @@
+"""
+Math Snake network protocol
+Binary messages between the multiplayer server and its clients. State goes
+out as tagged sections listing only what changed in a tick (moved heads and
+tails, eggs, scores); a full snapshot is the same sections filled in from
+an empty board, so clients apply both with one decoder.
+
+On TCP every message is prefixed with its length ('<I'); over WebSocket
+each binary frame holds one message.
+"""
+
+import base64
+import hashlib
+import struct
+from collections import deque
+
+from snake_engine import DIRECTION_CODES, CODE_OF
+
+LENGTH = struct.Struct('<I')
+MAX_MESSAGE = 1 << 16   # Longer incoming messages close the connection
+
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# Message types (first byte)
+MSG_HELLO = 1      # client -> server: player name (utf-8)
+MSG_WELCOME = 2    # server -> client: WELCOME
+MSG_STATE = 3      # server -> client: STATE header, then sections
+MSG_INPUT = 4      # client -> server: INPUT
+
+WELCOME = struct.Struct('<BHHHf')   # type, player id, board width, height, ticks per second
+STATE = struct.Struct('<BII')       # type, tick, last input sequence applied for this client
+INPUT = struct.Struct('<BIB')       # type, input sequence, direction code
+
+# Section tags; each section is tag, item count ('<BH') and the items
+SEC_END = 0
+SEC_RESET = 1       # no items: clear everything
+SEC_ROUND = 2       # one item: ROUND
+SEC_JOIN = 3        # '<HB' player id, name length, then the name
+SEC_LEAVE = 4       # '<H' player id
+SEC_REMOVE = 5      # '<H' player id whose snake left the board
+SEC_SPAWN = 6       # '<HI' player id, cell count, then '<HH' cells head first
+SEC_MOVE = 7        # MOVE
+SEC_STATS = 8       # '<HIB' player id, score, lives
+SEC_EGGS_RESET = 9  # no items: remove every egg
+SEC_EGGS_GONE = 10  # '<HH' position
+SEC_EGGS_NEW = 11   # '<HHh' position, number
+SEC_EQUATION = 12   # numbers as '<h', then '<H' text length and the text
+SEC_COLLECTED = 13  # '<h' number
+
+SECTION = struct.Struct('<BH')
+ROUND = struct.Struct('<IHB')       # round, level, game over
+MOVE = struct.Struct('<HHHB')       # player id, head x, head y, grew (tail stays)
+CELL = struct.Struct('<HH')
+JOIN = struct.Struct('<HB')
+PLAYER = struct.Struct('<H')
+SPAWN = struct.Struct('<HI')
+STATS = struct.Struct('<HIB')
+EGG = struct.Struct('<HHh')
+NUMBER = struct.Struct('<h')
+
+
+def frame(payload):
+    """TCP framing"""
+    return LENGTH.pack(len(payload)) + payload
+
+
+class TcpTransport:
+    """Length-prefixed messages over a plain stream"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def read(self):
+        header = await self.reader.readexactly(LENGTH.size)
+        length, = LENGTH.unpack(header)
+        if length > MAX_MESSAGE:
+            raise ConnectionError("message too large")
+        return await self.reader.readexactly(length)
+
+    def send(self, payload):
+        self.writer.write(frame(payload))
+
+
+class WebSocketTransport:
+    """Just enough RFC 6455 for binary messages: handshake, masked client frames, ping and close"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def handshake(self):
+        request = await self.reader.readuntil(b'\r\n\r\n')
+        key = None
+        for line in request.split(b'\r\n'):
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'sec-websocket-key':
+                key = value.strip()
+        if key is None:
+            raise ConnectionError("not a WebSocket upgrade")
+        accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest())
+        self.writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                          b'Connection: Upgrade\r\nSec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+    async def read(self):
+        while True:
+            first, second = await self.reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack('>H', await self.reader.readexactly(2))
+            elif length == 127:
+                length, = struct.unpack('>Q', await self.reader.readexactly(8))
+            if length > MAX_MESSAGE:
+                raise ConnectionError("message too large")
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                key = int.from_bytes((mask * (length // 4 + 1))[:length], 'big')
+                payload = (int.from_bytes(payload, 'big') ^ key).to_bytes(length, 'big')
+            if opcode == 0x8:
+                raise ConnectionError("closed by client")
+            if opcode == 0x9:
+                self.send(payload, opcode=0xA)
+                continue
+            if opcode in (0x1, 0x2):
+                return payload
+
+    def send(self, payload, opcode=0x2):
+        length = len(payload)
+        if length < 126:
+            header = bytes((0x80 | opcode, length))
+        elif length < 1 << 16:
+            header = bytes((0x80 | opcode, 126)) + struct.pack('>H', length)
+        else:
+            header = bytes((0x80 | opcode, 127)) + struct.pack('>Q', length)
+        self.writer.write(header + payload)
+
+
+def encode_sections(engine, delta=None):
+    """Sections for the changes in delta, or a full snapshot of engine when delta is None"""
+    parts = []
+
+    def section(tag, items, pack=None):
+        parts.append(SECTION.pack(tag, len(items)))
+        if pack is not None:
+            parts.extend(pack.pack(*item) for item in items)
+
+    players = engine.players
+    snapshot = delta is None
+    if snapshot or delta.reset:
+        section(SEC_RESET, ())
+
+    if snapshot or delta.reset or delta.round:
+        section(SEC_ROUND, [(engine.round, engine.level, engine.game_over)], ROUND)
+
+    joined = [(p.id, p.name) for p in players.values()] if snapshot or delta.reset else delta.joined
+    if joined:
+        parts.append(SECTION.pack(SEC_JOIN, len(joined)))
+        for player_id, name in joined:
+            name = name.encode()[:255]
+            parts.append(JOIN.pack(player_id, len(name)) + name)
+
+    if not snapshot and delta.left:
+        section(SEC_LEAVE, [(player_id,) for player_id in delta.left], PLAYER)
+
+    if snapshot or delta.reset:
+        spawned = [(p.id, p.snake) for p in players.values() if p.alive]
+    else:
+        if delta.removed:
+            section(SEC_REMOVE, [(player_id,) for player_id in delta.removed], PLAYER)
+        # Snakes that appeared during the delta go out whole, as they are now
+        spawned = [(player_id, players[player_id].snake) for player_id, _ in delta.spawned
+                   if player_id in players and players[player_id].alive]
+    if spawned:
+        parts.append(SECTION.pack(SEC_SPAWN, len(spawned)))
+        for player_id, cells in spawned:
+            parts.append(SPAWN.pack(player_id, len(cells)))
+            parts.extend(CELL.pack(*pos) for pos in cells)
+
+    if not snapshot and not delta.reset:
+        skip = set(delta.removed).union(player_id for player_id, _ in spawned)
+        moves = [(player_id, x, y, grew) for player_id, (x, y), grew in delta.moves if player_id not in skip]
+        if moves:
+            section(SEC_MOVE, moves, MOVE)
+
+    changed = players.keys() if snapshot or delta.reset else delta.stats & players.keys()
+    if changed:
+        section(SEC_STATS, [(i, players[i].score, max(0, players[i].lives)) for i in sorted(changed)], STATS)
+
+    if snapshot or delta.reset or delta.eggs_reset:
+        section(SEC_EGGS_RESET, ())
+        eggs = [(x, y, egg.number) for (x, y), egg in engine.egg_at.items()]
+    else:
+        if delta.eggs_gone:
+            section(SEC_EGGS_GONE, delta.eggs_gone, CELL)
+        eggs = [(x, y, number) for (x, y), number in delta.eggs_new]
+    if eggs:
+        section(SEC_EGGS_NEW, eggs, EGG)
+
+    if snapshot or delta.reset or delta.equation:
+        numbers = engine.current_equation['numbers']
+        text = engine.current_equation['equation'].encode()
+        section(SEC_EQUATION, [(n,) for n in numbers], NUMBER)
+        parts.append(PLAYER.pack(len(text)) + text)
+        collected = engine.collected_numbers
+    else:
+        collected = delta.collected
+    if collected:
+        section(SEC_COLLECTED, [(n,) for n in collected], NUMBER)
+
+    parts.append(bytes((SEC_END,)))
+    return b''.join(parts)
+
+
+def state_message(tick, ack, sections):
+    """STATE payload; sections are shared by every client, only the header differs"""
+    return STATE.pack(MSG_STATE, tick, ack) + sections
+
+
+class ClientPlayer:
+    __slots__ = ('id', 'name', 'snake', 'score', 'lives')
+
+    def __init__(self, player_id, name):
+        self.id = player_id
+        self.name = name
+        self.snake = deque()
+        self.score = 0
+        self.lives = 0
+
+
+class ClientState:
+    """A client's copy of the board, kept current by applying STATE messages"""
+
+    def __init__(self):
+        self.tick = 0
+        self.ack = 0
+        self.reset()
+
+    def reset(self):
+        self.players = {}
+        self.eggs = {}
+        self.equation = ''
+        self.numbers = []
+        self.collected = []
+        self.round = 0
+        self.level = 0
+        self.game_over = False
+
+    def apply(self, payload):
+        """Apply one STATE message"""
+        _, self.tick, self.ack = STATE.unpack_from(payload, 0)
+        offset = STATE.size
+        players = self.players
+        while True:
+            tag = payload[offset]
+            if tag == SEC_END:
+                return
+            _, count = SECTION.unpack_from(payload, offset)
+            offset += SECTION.size
+
+            if tag == SEC_RESET:
+                self.reset()
+                players = self.players
+            elif tag == SEC_ROUND:
+                self.round, self.level, game_over = ROUND.unpack_from(payload, offset)
+                self.game_over = bool(game_over)
+                offset += ROUND.size
+            elif tag == SEC_JOIN:
+                for _ in range(count):
+                    player_id, length = JOIN.unpack_from(payload, offset)
+                    offset += JOIN.size
+                    name = payload[offset:offset + length].decode(errors='replace')
+                    offset += length
+                    players[player_id] = ClientPlayer(player_id, name)
+            elif tag in (SEC_LEAVE, SEC_REMOVE):
+                for _ in range(count):
+                    player_id, = PLAYER.unpack_from(payload, offset)
+                    offset += PLAYER.size
+                    if tag == SEC_LEAVE:
+                        players.pop(player_id, None)
+                    elif player_id in players:
+                        players[player_id].snake = deque()
+            elif tag == SEC_SPAWN:
+                for _ in range(count):
+                    player_id, cells = SPAWN.unpack_from(payload, offset)
+                    offset += SPAWN.size
+                    snake = deque(CELL.unpack_from(payload, offset + i * CELL.size) for i in range(cells))
+                    offset += cells * CELL.size
+                    if player_id in players:
+                        players[player_id].snake = snake
+            elif tag == SEC_MOVE:
+                for player_id, x, y, grew in MOVE.iter_unpack(payload[offset:offset + count * MOVE.size]):
+                    snake = players[player_id].snake
+                    snake.appendleft((x, y))
+                    if not grew:
+                        snake.pop()
+                offset += count * MOVE.size
+            elif tag == SEC_STATS:
+                for player_id, score, lives in STATS.iter_unpack(payload[offset:offset + count * STATS.size]):
+                    if player_id in players:
+                        players[player_id].score = score
+                        players[player_id].lives = lives
+                offset += count * STATS.size
+            elif tag == SEC_EGGS_RESET:
+                self.eggs = {}
+            elif tag == SEC_EGGS_GONE:
+                for pos in CELL.iter_unpack(payload[offset:offset + count * CELL.size]):
+                    self.eggs.pop(pos, None)
+                offset += count * CELL.size
+            elif tag == SEC_EGGS_NEW:
+                for x, y, number in EGG.iter_unpack(payload[offset:offset + count * EGG.size]):
+                    self.eggs[(x, y)] = number
+                offset += count * EGG.size
+            elif tag == SEC_EQUATION:
+                self.numbers = [n for n, in NUMBER.iter_unpack(payload[offset:offset + count * NUMBER.size])]
+                offset += count * NUMBER.size
+                length, = PLAYER.unpack_from(payload, offset)
+                offset += PLAYER.size
+                self.equation = payload[offset:offset + length].decode()
+                offset += length
+                self.collected = []
+            elif tag == SEC_COLLECTED:
+                self.collected.extend(n for n, in NUMBER.iter_unpack(payload[offset:offset + count * NUMBER.size]))
+                offset += count * NUMBER.size
+            else:
+                raise ValueError(f"unknown state section {tag}")
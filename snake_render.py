@@ -0,0 +1,122 @@
+"""
+Math Snake rendering helpers
+Caches for the pygame frontend so draw() does not redo work every frame.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by font, string and color"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        """Return an antialiased surface for the text, rendering it only on a cache miss"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop every cached surface"""
+        self.surfaces.clear()
+
+
+class SpriteAtlas:
+    """Square sprites of one size packed into a single surface, drawn with batched blits"""
+
+    def __init__(self, size, columns=16):
+        self.size = size
+        self.columns = columns
+        self.areas = {}
+        self.surface = self._new_surface(rows=4)
+
+    def _new_surface(self, rows):
+        surface = pygame.Surface((self.size * self.columns, self.size * rows), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def __contains__(self, key):
+        return key in self.areas
+
+    def add(self, key, painter):
+        """Reserve a slot for a sprite and let painter(surface) draw it in local coordinates"""
+        slot = len(self.areas)
+        row, column = divmod(slot, self.columns)
+        if (row + 1) * self.size > self.surface.get_height():
+            # Out of rows: double the atlas height and keep the existing sprites
+            grown = self._new_surface(rows=2 * self.surface.get_height() // self.size)
+            grown.blit(self.surface, (0, 0))
+            self.surface = grown
+
+        area = pygame.Rect(column * self.size, row * self.size, self.size, self.size)
+        painter(self.surface.subsurface(area))
+        self.areas[key] = area
+        return area
+
+
+def paint_segment(surface, color, outline):
+    """Draw one snake segment on a sprite"""
+    size = surface.get_width()
+    rect = pygame.Rect(0, 0, size - 1, size - 1)
+    pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, outline, rect, 1)
+
+
+def paint_egg(surface, number, font, color, outline, text_color):
+    """Draw one egg with its number on a sprite"""
+    size = surface.get_width()
+    center = (size // 2, size // 2)
+    pygame.draw.circle(surface, color, center, size // 2 - 2)
+    pygame.draw.circle(surface, outline, center, size // 2 - 2, 2)
+    number_text = font.render(str(number), True, text_color)
+    surface.blit(number_text, number_text.get_rect(center=center))
+
+
+class BoardSprites:
+    """Snake segments and numbered eggs for a board, in one SpriteAtlas.
+
+    Segments are keyed ('segment', color). All eggs look the same apart from
+    their number; egg_area() renders a number's sprite on first use, and
+    eggs=N prerenders 1..N so the first frames don't have to.
+    """
+
+    def __init__(self, size, font, segment_colors, egg_color, outline, number_color, eggs=0):
+        self.font = font
+        self.egg_color = egg_color
+        self.outline = outline
+        self.number_color = number_color
+        self.atlas = SpriteAtlas(size)
+        for color in segment_colors:
+            self.atlas.add(('segment', color), lambda surface, color=color: paint_segment(surface, color, outline))
+        for number in range(1, eggs + 1):
+            self.egg_area(number)
+
+    def segment_area(self, color):
+        return self.atlas.areas[('segment', color)]
+
+    def egg_area(self, number):
+        """Atlas area of the egg sprite for a number, rendering it on first use"""
+        key = ('egg', number)
+        if key in self.atlas:
+            return self.atlas.areas[key]
+        return self.atlas.add(key, lambda surface: paint_egg(surface, number, self.font, self.egg_color,
+                                                             self.outline, self.number_color))
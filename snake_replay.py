@@ -0,0 +1,172 @@
+"""
+Math Snake record and replay
+Writes tick-indexed inputs to a compact binary log while a game is played,
+and re-runs logged games headless at full speed, checking the final state.
+
+Log layout (little-endian):
+    header      magic 'MSNK', version u8, width u16, height u16,
+                count u8, then count x (speed u8, ticks per second f64)
+    game start  tag 1, seed u32
+    input       tag 2, tick u32, direction u8   (only when the direction changes)
+    game end    tag 3, final tick u32, state hash 8 bytes
+"""
+
+import struct
+import sys
+import time
+from collections import namedtuple
+
+from snake_engine import SnakeEngine, STOP, DIRECTION_CODES, CODE_OF
+
+MAGIC = b'MSNK'
+VERSION = 2  # 2: equations drawn from the equation bank
+
+HEADER = struct.Struct('<4sBHHB')
+TICK_RATE = struct.Struct('<Bd')
+TAG = struct.Struct('<B')
+GAME_START = struct.Struct('<I')
+INPUT = struct.Struct('<IB')
+GAME_END = struct.Struct('<I8s')
+TAG_START, TAG_INPUT, TAG_END = 1, 2, 3
+
+Session = namedtuple('Session', 'width height tick_rates games')
+RecordedGame = namedtuple('RecordedGame', 'seed inputs final_tick state_hash')
+
+
+class InputRecorder:
+    """Logs the direction in force at each logic tick, one record per change"""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.header_written = False
+        self.in_game = False
+        self.last_code = None
+
+    def start_game(self, engine):
+        """Called by the engine after reset_game()"""
+        if not self.header_written:
+            rates = sorted(engine.tick_rates.items())
+            self.file.write(HEADER.pack(MAGIC, VERSION, engine.width, engine.height, len(rates)))
+            for speed, rate in rates:
+                self.file.write(TICK_RATE.pack(speed, rate))
+            self.header_written = True
+
+        self.file.write(TAG.pack(TAG_START) + GAME_START.pack(engine.seed))
+        self.in_game = True
+        self.last_code = None
+
+    def record(self, engine):
+        """Called by the engine before each tick that moves the snake"""
+        code = CODE_OF[engine.direction]
+        if code != self.last_code:
+            self.file.write(TAG.pack(TAG_INPUT) + INPUT.pack(engine.ticks, code))
+            self.last_code = code
+
+    def end_game(self, engine):
+        """Called by the engine on game over, or before a reset of an unfinished game"""
+        if not self.in_game:
+            return
+        # A turn made after the last tick is still part of the final state
+        if engine.direction != STOP:
+            self.record(engine)
+        self.file.write(TAG.pack(TAG_END) + GAME_END.pack(engine.ticks, engine.state_hash()))
+        self.file.flush()
+        self.in_game = False
+
+    def close(self, engine):
+        """Finish the current game and close the log"""
+        self.end_game(engine)
+        self.file.close()
+
+
+def read_log(path):
+    """Parse a log file into a Session; a game cut off by a crash has final_tick None"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, width, height, rate_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} Math Snake log")
+    offset = HEADER.size
+    tick_rates = {}
+    for _ in range(rate_count):
+        speed, rate = TICK_RATE.unpack_from(data, offset)
+        tick_rates[speed] = rate
+        offset += TICK_RATE.size
+
+    games = []
+    seed = None
+    inputs = []
+    while offset < len(data):
+        tag = data[offset]
+        offset += TAG.size
+        if tag == TAG_START:
+            if seed is not None:
+                games.append(RecordedGame(seed, inputs, None, None))
+            seed, = GAME_START.unpack_from(data, offset)
+            inputs = []
+            offset += GAME_START.size
+        elif tag == TAG_INPUT:
+            tick, code = INPUT.unpack_from(data, offset)
+            inputs.append((tick, DIRECTION_CODES[code]))
+            offset += INPUT.size
+        elif tag == TAG_END:
+            final_tick, state_hash = GAME_END.unpack_from(data, offset)
+            games.append(RecordedGame(seed, inputs, final_tick, state_hash))
+            seed = None
+            offset += GAME_END.size
+        else:
+            raise ValueError(f"{path}: bad record tag {tag} at byte {offset - 1}")
+    if seed is not None:
+        games.append(RecordedGame(seed, inputs, None, None))
+
+    return Session(width, height, tick_rates, games)
+
+
+def replay_game(engine, game):
+    """Re-run a recorded game headless on engine; returns True if the final state hash matches"""
+    engine.reset_game(game.seed)
+    inputs = game.inputs
+    last_tick = game.final_tick if game.final_tick is not None else (inputs[-1][0] + 1 if inputs else 0)
+    i = 0
+    while engine.ticks < last_tick and not engine.game_over:
+        while i < len(inputs) and inputs[i][0] == engine.ticks:
+            engine.direction = inputs[i][1]
+            i += 1
+        if engine.direction == STOP:
+            break  # Corrupt log: nothing left to drive the snake
+        engine.step()
+    while i < len(inputs) and inputs[i][0] == engine.ticks:
+        engine.direction = inputs[i][1]
+        i += 1
+
+    if game.state_hash is None:
+        return None
+    return engine.state_hash() == game.state_hash
+
+
+def replay_files(paths):
+    """Replay every game in the given logs; returns (games, mismatches, ticks, seconds)"""
+    games = mismatches = ticks = 0
+    start = time.perf_counter()
+    for path in paths:
+        session = read_log(path)
+        engine = SnakeEngine(session.width, session.height, session.tick_rates)
+        for game in session.games:
+            ok = replay_game(engine, game)
+            games += 1
+            ticks += engine.ticks
+            if ok is False:
+                mismatches += 1
+                print(f"{path}: game with seed {game.seed} diverged at tick {engine.ticks}")
+    return games, mismatches, ticks, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python snake_replay.py LOG [LOG ...]")
+        sys.exit(2)
+    games, mismatches, ticks, seconds = replay_files(sys.argv[1:])
+    print(f"Replayed {games} games, {ticks} ticks in {seconds:.2f}s "
+          f"({ticks / max(seconds, 1e-9):,.0f} ticks/s), {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
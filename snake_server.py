@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Math Snake multiplayer server
+Runs the authoritative MultiplayerEngine on an asyncio tick loop and streams
+delta-compressed state to TCP and WebSocket clients.
+
+    python snake_server.py --port 8765 --ws-port 8766
+    python snake_server.py --simulate 32 --seconds 10     # load test on localhost
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import struct
+import sys
+import time
+from collections import deque
+
+from snake_engine import DIRECTIONS
+from snake_multi import MultiplayerEngine
+from snake_protocol import (
+    LENGTH, MSG_HELLO, MSG_WELCOME, MSG_STATE, MSG_INPUT, WELCOME, INPUT,
+    DIRECTION_CODES, CODE_OF, ClientState, TcpTransport, WebSocketTransport, encode_sections, state_message,
+)
+
+TICK_RATE = 10.0
+ROUND_RESTART_SECONDS = 3.0
+
+# A client may queue a few turns ahead; one is applied per tick
+MAX_QUEUED_INPUTS = 4
+
+# Clients that fall this far behind on reading are dropped rather than buffered for
+MAX_WRITE_BUFFER = 1 << 20
+
+
+class Connection:
+    """A connected client and the player it controls"""
+
+    def __init__(self, transport, player):
+        self.transport = transport
+        self.player = player
+        self.inputs = deque()   # (sequence, direction) waiting for a tick
+        self.ack = 0            # Last input sequence applied
+
+
+class GameServer:
+    def __init__(self, engine, tick_rate=TICK_RATE):
+        self.engine = engine
+        self.tick_rate = tick_rate
+        self.connections = {}
+        self.snapshot_due = set()   # Connections that need a full snapshot next tick
+
+        # Statistics
+        self.tick_lag = deque(maxlen=1000)      # Seconds each tick started late
+        self.tick_cost = deque(maxlen=1000)     # Seconds spent simulating, encoding and sending
+        self.bytes_sent = 0
+        self.ticks = 0
+
+    async def serve_tcp(self, reader, writer):
+        await self.serve(TcpTransport(reader, writer))
+
+    async def serve_ws(self, reader, writer):
+        transport = WebSocketTransport(reader, writer)
+        try:
+            await transport.handshake()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        await self.serve(transport)
+
+    async def serve(self, transport):
+        connection = None
+        try:
+            hello = await transport.read()
+            if hello[:1] != bytes((MSG_HELLO,)):
+                return
+            player = self.engine.add_player(hello[1:33].decode(errors='replace') or 'player')
+            if player is None:
+                return
+            connection = Connection(transport, player)
+            self.connections[player.id] = connection
+            self.snapshot_due.add(connection)
+            transport.send(WELCOME.pack(MSG_WELCOME, player.id, self.engine.width, self.engine.height,
+                                        self.tick_rate))
+
+            while True:
+                message = await transport.read()
+                if message[:1] == bytes((MSG_INPUT,)) and len(message) == INPUT.size:
+                    _, sequence, code = INPUT.unpack(message)
+                    if code < len(DIRECTION_CODES) and len(connection.inputs) < MAX_QUEUED_INPUTS:
+                        connection.inputs.append((sequence, DIRECTION_CODES[code]))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if connection is not None:
+                self.drop(connection)
+            transport.writer.close()
+
+    def drop(self, connection):
+        if self.connections.pop(connection.player.id, None) is not None:
+            self.engine.remove_player(connection.player.id)
+            self.snapshot_due.discard(connection)
+
+    def tick(self):
+        """Apply one queued input per player, step the game and send everyone the changes"""
+        engine = self.engine
+        for connection in self.connections.values():
+            if connection.inputs:
+                sequence, direction = connection.inputs.popleft()
+                engine.turn_player(connection.player.id, direction)
+                connection.ack = sequence
+
+        engine.step()
+        reset = engine.delta.reset
+        delta = encode_sections(engine, engine.delta)
+        engine.delta.clear()
+        snapshot = encode_sections(engine) if self.snapshot_due and not reset else delta
+
+        for connection in list(self.connections.values()):
+            sections = snapshot if connection in self.snapshot_due else delta
+            message = state_message(engine.ticks, connection.ack, sections)
+            connection.transport.send(message)
+            self.bytes_sent += len(message)
+            if connection.transport.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                connection.transport.writer.close()
+                self.drop(connection)
+        self.snapshot_due.clear()
+        self.ticks += 1
+
+    async def run(self):
+        """Tick at a fixed rate; a new round starts a few seconds after the last one ends"""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        restart_at = None
+        while True:
+            now = loop.time()
+            if now < next_tick:
+                await asyncio.sleep(next_tick - now)
+                now = loop.time()
+            self.tick_lag.append(now - next_tick)
+
+            if self.engine.game_over:
+                if restart_at is None:
+                    restart_at = now + ROUND_RESTART_SECONDS
+                elif now >= restart_at and self.connections:
+                    restart_at = None
+                    self.engine.reset_game()
+
+            start = time.perf_counter()
+            self.tick()
+            self.tick_cost.append(time.perf_counter() - start)
+
+            next_tick += interval
+            if loop.time() - next_tick > interval * 5:
+                next_tick = loop.time()  # Far behind: skip ahead instead of bursting
+
+
+class SimulatedClient:
+    """Bot client for load tests: random safe turns, measures bandwidth and input latency"""
+
+    def __init__(self, name, rng):
+        self.name = name
+        self.rng = rng
+        self.state = ClientState()
+        self.player_id = None
+        self.sequence = 0
+        self.sent_at = {}
+        self.latencies = []
+        self.bytes_received = 0
+        self.messages = 0
+
+    async def run(self, host, port, seconds):
+        reader, writer = await asyncio.open_connection(host, port)
+        transport = TcpTransport(reader, writer)
+        transport.send(bytes((MSG_HELLO,)) + self.name.encode())
+        deadline = time.perf_counter() + seconds
+        try:
+            while time.perf_counter() < deadline:
+                message = await asyncio.wait_for(transport.read(), timeout=max(0.01, deadline - time.perf_counter()))
+                self.bytes_received += len(message) + LENGTH.size
+                if message[0] == MSG_WELCOME:
+                    self.player_id = WELCOME.unpack(message)[1]
+                elif message[0] == MSG_STATE:
+                    self.messages += 1
+                    self.state.apply(message)
+                    now = time.perf_counter()
+                    for sequence in [s for s in self.sent_at if s <= self.state.ack]:
+                        self.latencies.append(now - self.sent_at.pop(sequence))
+                    self.steer(transport)
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        writer.close()
+
+    def steer(self, transport):
+        player = self.state.players.get(self.player_id)
+        if player is None or not player.snake or self.rng.random() > 0.3:
+            return
+        head = player.snake[0]
+        neck = player.snake[1] if len(player.snake) > 1 else None
+        occupied = {pos for p in self.state.players.values() for pos in p.snake}
+        choices = [d for d in DIRECTIONS
+                   if (head[0] + d[0], head[1] + d[1]) != neck
+                   and (head[0] + d[0], head[1] + d[1]) not in occupied]
+        if not choices:
+            return
+        self.sequence += 1
+        self.sent_at[self.sequence] = time.perf_counter()
+        transport.send(INPUT.pack(MSG_INPUT, self.sequence, CODE_OF[self.rng.choice(choices)]))
+
+
+async def simulate(clients, seconds, width, height, tick_rate, seed):
+    """Run a server and simulated clients on localhost and report what it cost"""
+    server = GameServer(MultiplayerEngine(width, height, seed=seed), tick_rate)
+    listener = await asyncio.start_server(server.serve_tcp, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    ticker = asyncio.create_task(server.run())
+
+    rng = random.Random(seed)
+    bots = [SimulatedClient(f"bot{i}", random.Random(rng.random())) for i in range(clients)]
+    await asyncio.gather(*(bot.run('127.0.0.1', port, seconds) for bot in bots))
+    ticker.cancel()
+    listener.close()
+
+    latencies = sorted(latency for bot in bots for latency in bot.latencies)
+    received = sum(bot.bytes_received for bot in bots)
+    messages = sum(bot.messages for bot in bots)
+    lag = sorted(server.tick_lag)
+    cost = sorted(server.tick_cost)
+
+    def pct(values, fraction):
+        return values[min(len(values) - 1, int(fraction * len(values)))] * 1000 if values else 0.0
+
+    print(f"{clients} clients, {server.ticks} ticks at {tick_rate:g}/s on {width}x{height}")
+    print(f"  bytes per client per tick: {received / max(1, messages):.1f} "
+          f"({received / seconds / 1024:.1f} KiB/s total)")
+    print(f"  input latency ms p50/p95: {pct(latencies, 0.5):.1f}/{pct(latencies, 0.95):.1f} "
+          f"over {len(latencies)} inputs")
+    print(f"  tick lag ms p50/p95: {pct(lag, 0.5):.2f}/{pct(lag, 0.95):.2f}, "
+          f"tick cost ms mean: {statistics.fmean(cost) * 1000 if cost else 0:.2f}")
+
+
+def parse_board(text):
+    width, height = (int(value) for value in text.lower().split('x'))
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Snake multiplayer server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--ws-port", type=int, help="also accept WebSocket clients on this port")
+    parser.add_argument("--board", type=parse_board, default=(40, 30), metavar="WxH")
+    parser.add_argument("--tick-rate", type=float, default=TICK_RATE)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--simulate", type=int, metavar="N", help="load test with N bot clients and exit")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of a --simulate run")
+    args = parser.parse_args()
+
+    if args.simulate:
+        asyncio.run(simulate(args.simulate, args.seconds, *args.board, args.tick_rate, args.seed))
+        return
+
+    async def serve():
+        server = GameServer(MultiplayerEngine(*args.board, seed=args.seed), args.tick_rate)
+        listeners = [await asyncio.start_server(server.serve_tcp, args.host, args.port)]
+        if args.ws_port:
+            listeners.append(await asyncio.start_server(server.serve_ws, args.host, args.ws_port))
+        print(f"Serving on {args.host}:{args.port} (TCP)"
+              + (f" and {args.ws_port} (WebSocket)" if args.ws_port else ""), file=sys.stderr)
+        await server.run()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
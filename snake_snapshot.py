@@ -0,0 +1,261 @@
+"""
+Math Snake state snapshots
+Versioned binary snapshots of a SnakeEngine game: a fixed header followed by
+flat arrays (snake cells, eggs, collected numbers), written with pack_into
+into a reused buffer. A normal game snapshots in a couple of hundred bytes,
+which is cheap enough to take every tick for rollback or network sync.
+
+Exact snapshots also carry the RNG state and the order of the free-cell
+index, so a restored game plays on identically to the original: use them
+for save/resume and rollback. Without them the restored game is the same
+board but draws new eggs and equations from a fresh RNG.
+
+Board size and difficulty are the engine's configuration, not state: a
+snapshot restores into an engine built with the same settings.
+"""
+
+import math
+import os
+import random
+import struct
+from collections import deque
+
+from equation_bank import EquationSampler, load_bank
+from snake_cache import cache_path, write_atomic
+from snake_engine import Egg, DIRECTION_CODES, CODE_OF
+
+MAGIC = b'MSSS'
+VERSION = 1
+
+FLAG_EXACT = 1
+
+# State bits
+PENALTY = 1
+GAME_OVER = 2
+PAUSED = 4
+TIMER_RUNNING = 8
+# Timers hold ints until their first tick; these bits keep the type so state_hash() matches after a restore
+INT_PENALTY_TIMER = 16
+INT_TIME_REMAINING = 32
+INT_TIME_LIMIT = 64
+
+HEADER = struct.Struct(
+    '<4sBB'   # magic, version, flags
+    'HH'      # board width, height
+    'III'     # game seed, ticks, score
+    'HbBBBB'  # level, lives, base speed, current speed, direction code, state bits
+    'ddd'     # penalty timer, time remaining, level time limit
+    'BI'      # equation: bank table level, index
+    'IIHHB'   # counts: snake cells, eggs, collected numbers, recent equations, reason bytes
+)
+
+RNG_WORDS = 625   # Mersenne Twister state: 624 words and the position
+RNG = struct.Struct(f'<{RNG_WORDS}Id')   # ... plus the cached gauss value (NaN for none)
+
+SAVE_NAME = "savegame.bin"
+
+
+def cell_format(width, height):
+    """Array type of one cell index for a board size"""
+    return 'H' if width * height <= 1 << 16 else 'I'
+
+
+class SnapshotCodec:
+    """Encodes and restores engine snapshots, reusing one scratch buffer"""
+
+    def __init__(self, size=4096):
+        self.buffer = bytearray(size)
+
+    def size(self, engine, exact=True):
+        cell = struct.calcsize(cell_format(engine.width, engine.height))
+        recent = sum(len(indices) for indices in engine.equations.recent.values())
+        reason = len(engine.game_over_reason.encode()) if engine.game_over_reason else 0
+        size = (HEADER.size + cell * len(engine.snake) + (cell + 3) * len(engine.egg_at)
+                + 2 * len(engine.collected_numbers) + 5 * recent + reason)
+        if exact:
+            size += RNG.size + 4 + cell * len(engine.free_cells)
+        return size
+
+    def pack_into(self, engine, buffer, offset=0, exact=True):
+        """Write a snapshot of engine at offset; returns the number of bytes written"""
+        width = engine.width
+        cell = cell_format(width, engine.height)
+        start = offset
+        reason = engine.game_over_reason.encode() if engine.game_over_reason else b''
+        recent = engine.equations.recent
+        recent_count = sum(len(indices) for indices in recent.values())
+        table_level, index = engine.equations.last
+
+        bits = ((PENALTY if engine.wrong_egg_penalty else 0) | (GAME_OVER if engine.game_over else 0)
+                | (PAUSED if engine.paused else 0) | (TIMER_RUNNING if engine.timer_running else 0)
+                | (INT_PENALTY_TIMER if type(engine.penalty_timer) is int else 0)
+                | (INT_TIME_REMAINING if type(engine.time_remaining) is int else 0)
+                | (INT_TIME_LIMIT if type(engine.level_time_limit) is int else 0))
+        HEADER.pack_into(
+            buffer, offset, MAGIC, VERSION, FLAG_EXACT if exact else 0, width, engine.height,
+            engine.seed, engine.ticks, engine.score,
+            engine.level, engine.lives, engine.base_speed, engine.current_speed, CODE_OF[engine.direction], bits,
+            engine.penalty_timer, engine.time_remaining, engine.level_time_limit,
+            table_level, index,
+            len(engine.snake), len(engine.egg_at), len(engine.collected_numbers), recent_count, len(reason))
+        offset += HEADER.size
+
+        def pack(fmt, values):
+            nonlocal offset
+            struct.pack_into(fmt, buffer, offset, *values)
+            offset += struct.calcsize(fmt)
+
+        # Structure of arrays: one pack_into per field
+        pack(f'<{len(engine.snake)}{cell}', [y * width + x for x, y in engine.snake])
+        eggs = engine.egg_at
+        pack(f'<{len(eggs)}{cell}', [y * width + x for x, y in eggs])
+        pack(f'<{len(eggs)}h', [egg.number for egg in eggs.values()])
+        pack(f'<{len(eggs)}B', [egg.is_target for egg in eggs.values()])
+        pack(f'<{len(engine.collected_numbers)}h', engine.collected_numbers)
+        pack(f'<{recent_count}B', [level for level, indices in recent.items() for _ in indices])
+        pack(f'<{recent_count}I', [i for indices in recent.values() for i in indices])
+        buffer[offset:offset + len(reason)] = reason
+        offset += len(reason)
+
+        if exact:
+            _, words, gauss = engine.rng.getstate()
+            RNG.pack_into(buffer, offset, *words, math.nan if gauss is None else gauss)
+            offset += RNG.size
+            free = engine.free_cells
+            pack(f'<I{len(free)}{cell}', [len(free), *free])
+        return offset - start
+
+    def encode(self, engine, exact=True):
+        """Snapshot as bytes"""
+        size = self.size(engine, exact)
+        if len(self.buffer) < size:
+            self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+        self.pack_into(engine, self.buffer, 0, exact)
+        return bytes(memoryview(self.buffer)[:size])
+
+    def restore(self, engine, data, offset=0):
+        """Put the game in a snapshot into engine, replacing its current game"""
+        (magic, version, flags, width, height, seed, ticks, score, level, lives, base_speed, current_speed,
+         direction, bits, penalty_timer, time_remaining, level_time_limit, table_level, index,
+         snake_count, egg_count, collected_count, recent_count, reason_length) = HEADER.unpack_from(data, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Math Snake snapshot of this version")
+        if (width, height) != (engine.width, engine.height):
+            raise ValueError(f"snapshot is for a {width}x{height} board, not {engine.width}x{engine.height}")
+        offset += HEADER.size
+        cell = cell_format(width, height)
+
+        def unpack(fmt):
+            nonlocal offset
+            values = struct.unpack_from(fmt, data, offset)
+            offset += struct.calcsize(fmt)
+            return values
+
+        snake = unpack(f'<{snake_count}{cell}')
+        egg_cells = unpack(f'<{egg_count}{cell}')
+        egg_numbers = unpack(f'<{egg_count}h')
+        egg_targets = unpack(f'<{egg_count}B')
+        collected = unpack(f'<{collected_count}h')
+        recent_levels = unpack(f'<{recent_count}B')
+        recent_indices = unpack(f'<{recent_count}I')
+        reason = bytes(data[offset:offset + reason_length]).decode() or None
+        offset += reason_length
+
+        rng = random.Random()
+        if flags & FLAG_EXACT:
+            state = unpack(RNG.format)
+            gauss = state[-1]
+            rng.setstate((3, state[:-1], None if math.isnan(gauss) else gauss))
+            free_count, = unpack('<I')
+            free = unpack(f'<{free_count}{cell}')
+        else:
+            rng.seed((seed << 32) | ticks)
+            free = None
+
+        bank = load_bank()
+        if not 0 <= table_level < len(bank.tables) or index >= len(bank.tables[table_level]):
+            raise ValueError("snapshot refers to an equation the bank does not have")
+        sampler = EquationSampler(bank, rng)
+        for recent_level, i in zip(recent_levels, recent_indices):
+            sampler.recent.setdefault(recent_level, deque(maxlen=sampler.window)).append(i)
+        sampler.last = (table_level, index)
+
+        # Everything is read and checked: replace the engine's game
+        engine.rng = rng
+        engine.equations = sampler
+        engine.seed = seed
+        engine.ticks = ticks
+        engine.score = score
+        engine.level = level
+        engine.lives = lives
+        engine.base_speed = base_speed
+        engine.current_speed = current_speed
+        engine.direction = DIRECTION_CODES[direction]
+        engine.wrong_egg_penalty = bool(bits & PENALTY)
+        engine.game_over = bool(bits & GAME_OVER)
+        engine.paused = bool(bits & PAUSED)
+        engine.timer_running = bool(bits & TIMER_RUNNING)
+        engine.penalty_timer = int(penalty_timer) if bits & INT_PENALTY_TIMER else penalty_timer
+        engine.time_remaining = int(time_remaining) if bits & INT_TIME_REMAINING else time_remaining
+        engine.level_time_limit = int(level_time_limit) if bits & INT_TIME_LIMIT else level_time_limit
+        engine.game_over_reason = reason
+        engine.events = []
+
+        engine.current_equation = bank.tables[table_level].equation(index)
+        engine.numbers_to_collect = engine.current_equation['numbers'].copy()
+        engine.collected_numbers = list(collected)
+        engine.egg_at = {}
+        for c, number, target in zip(egg_cells, egg_numbers, egg_targets):
+            pos = (c % width, c // width)
+            engine.egg_at[pos] = Egg(pos, number, bool(target))
+        engine.eggs = list(engine.egg_at.values())
+
+        body = [(c % width, c // width) for c in snake]
+        if free is None:
+            engine.place_snake(body)   # Rebuilds the free-cell index
+        else:
+            engine.snake = deque(body)
+            engine.occupied = occupied = bytearray(width * height)
+            for c in snake:
+                occupied[c] = 1
+            engine.free_cells = list(free)
+            engine.free_slot = free_slot = [-1] * (width * height)
+            for slot, c in enumerate(free):
+                free_slot[c] = slot
+        return offset
+
+
+_codec = SnapshotCodec()
+
+
+def snapshot(engine, exact=True):
+    """Snapshot of an engine's game as bytes"""
+    return _codec.encode(engine, exact)
+
+
+def restore(engine, data):
+    """Replace an engine's game with the one in a snapshot"""
+    _codec.restore(engine, data)
+
+
+def save_game(engine, path=None):
+    """Save an in-progress game (an exact snapshot) to path, by default the cache"""
+    write_atomic(path or cache_path(SAVE_NAME), snapshot(engine))
+
+
+def load_game(engine, path=None):
+    """Resume the saved game into engine; returns False if there is no usable save"""
+    try:
+        with open(path or cache_path(SAVE_NAME), 'rb') as f:
+            restore(engine, f.read())
+    except (OSError, ValueError, struct.error):
+        return False
+    return True
+
+
+def discard_game(path=None):
+    """Remove the saved game, if any"""
+    try:
+        os.remove(path or cache_path(SAVE_NAME))
+    except OSError:
+        pass
@@ -0,0 +1,104 @@
+"""
+Math Snake sound effects
+Sine-tone effects synthesized to the mixer's sample format, cached on disk as
+raw PCM and loaded on a background thread so they never hold up the first
+frame.
+"""
+
+import hashlib
+import math
+import threading
+from array import array
+
+import pygame
+
+from snake_cache import cache_path, write_atomic
+
+SOUND_VERSION = 1
+
+# name: (frequency Hz, duration s, amplitude out of 32767)
+SOUNDS = {
+    'success': (523, 0.2, 4096),    # C note
+    'error': (200, 0.3, 2048),      # Low buzz
+    'game_over': (150, 0.5, 3072),
+}
+
+AUDIO_S16 = -16  # pygame.mixer.get_init() format for signed 16-bit samples
+
+
+def synthesize(frequency, duration, amplitude, sample_rate, channels):
+    """Interleaved signed 16-bit samples of a sine tone"""
+    frames = int(duration * sample_rate)
+    step = 2 * math.pi * frequency / sample_rate
+    mono = array('h', [int(amplitude * math.sin(step * i)) for i in range(frames)])
+    if channels == 1:
+        return mono
+    samples = array('h', bytes(2 * frames * channels))
+    for channel in range(channels):
+        samples[channel::channels] = mono
+    return samples
+
+
+def sound_key(name, mixer_settings):
+    """Cache key for a sound: its tone and the mixer (rate, format, channels) it was made for"""
+    params = (SOUND_VERSION, name, SOUNDS[name], tuple(mixer_settings))
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+
+def load_pcm(name, mixer_settings):
+    """Raw PCM for a sound, from the cache or synthesized and cached"""
+    file_name = f"sound-{name}-{sound_key(name, mixer_settings)}.pcm"
+    try:
+        with open(cache_path(file_name), 'rb') as f:
+            return f.read()
+    except OSError:
+        pass
+
+    sample_rate, _, channels = mixer_settings
+    data = synthesize(*SOUNDS[name], sample_rate, channels).tobytes()
+    try:
+        write_atomic(cache_path(file_name), data)
+    except OSError:
+        pass  # Read-only cache or no cache directory: synthesize again next launch
+    return data
+
+
+class SoundBank:
+    """The game's sound effects, loaded in the background.
+
+    play() is a no-op until a sound has loaded, and always when audio is
+    disabled or the mixer is not running (the no-audio fast path: nothing is
+    synthesized or read).
+    """
+
+    def __init__(self, enabled=True):
+        self.sounds = {}
+        self.thread = None
+        self.mixer_settings = pygame.mixer.get_init() if enabled else None
+
+        if self.mixer_settings is None:
+            return
+        if self.mixer_settings[1] != AUDIO_S16:
+            print(f"Unsupported mixer format {self.mixer_settings[1]}, sounds disabled")
+            self.mixer_settings = None
+            return
+
+        self.thread = threading.Thread(target=self.load_all, name='sound-loader', daemon=True)
+        self.thread.start()
+
+    def load_all(self):
+        try:
+            for name in SOUNDS:
+                self.sounds[name] = pygame.mixer.Sound(buffer=load_pcm(name, self.mixer_settings))
+        except (pygame.error, OSError) as e:
+            print(f"Sound loading failed ({e}), sounds disabled")
+
+    def wait(self, timeout=None):
+        """Block until background loading finishes (tests and benchmarks)"""
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Math Snake gameplay telemetry
+What happens in a game (eggs eaten, equations solved, lives lost, level ups,
+game over and why) as fixed-size binary records. The game thread packs each
+record into a preallocated ring buffer, which takes a microsecond or two; a
+background thread appends the buffered records to rotating files in the
+cache directory about once a second.
+
+Equations are stored as their equation bank (table, index) pair, so reports
+can name them without the files carrying any text.
+
+    python snake_telemetry.py                 # report on everything recorded
+    python snake_telemetry.py FILE [FILE...]
+"""
+
+import glob
+import os
+import struct
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from equation_bank import BANK_VERSION, load_bank
+from snake_cache import cache_dir
+from snake_engine import EVENT_TARGET, EVENT_DECOY, EVENT_SOLVED, EVENT_LEVEL_UP, EVENT_GAME_OVER
+
+# Event codes in the files
+EGG = 1          # Ate a number of the equation (number)
+LIFE_LOST = 2    # Ate a decoy (number) and lost a life
+SOLVED = 3       # Collected every number of the equation
+LEVEL_UP = 4     # Reached a new level (level is the new one)
+GAME_OVER = 5    # Game ended (reason)
+
+EVENT_CODES = {EVENT_TARGET: EGG, EVENT_DECOY: LIFE_LOST, EVENT_SOLVED: SOLVED,
+               EVENT_LEVEL_UP: LEVEL_UP, EVENT_GAME_OVER: GAME_OVER}
+REASONS = ("Game Over", "Time's up!", "Hit the wall!", "Hit yourself!", "No lives left!")
+REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+
+RECORD = struct.Struct(
+    '<dI'    # wall-clock time, game (its seed)
+    'IIf'    # game tick, ticks spent on the equation so far, level time remaining
+    'BBBB'   # event, level, lives, reason
+    'hH'     # egg number, score
+    'BI'     # equation: bank table level, index
+)
+FILE_MAGIC = b'MSTL'
+FILE_HEADER = struct.Struct('<4sBBHB')   # magic, version, bank version, record size, player name length
+FILE_VERSION = 1
+
+CAPACITY = 4096                # Records in the ring buffer
+FLUSH_SECONDS = 1.0
+MAX_FILE_BYTES = 1 << 20       # Start a new file past this size
+KEEP_FILES = 20                # Oldest files beyond this many are deleted
+
+
+def telemetry_dir():
+    path = os.path.join(cache_dir(), "telemetry")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class Telemetry:
+    """Ring buffer of event records with a background flusher.
+
+    record_step() runs on the game thread. It only packs into the buffer
+    and moves the write counter; the flusher copies out everything below
+    that counter and moves the read counter. If the flusher falls a whole
+    buffer behind, new records are dropped (and counted) rather than
+    overwriting ones not yet written.
+    """
+
+    def __init__(self, player="player", directory=None, capacity=CAPACITY):
+        self.player = player
+        self.directory = directory
+        if directory is None:
+            try:
+                self.directory = telemetry_dir()
+            except OSError as e:
+                # Keep the same calls working; the flusher just discards what it takes
+                print(f"Telemetry unavailable ({e}), events will not be saved")
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.written = 0      # Records packed (game thread)
+        self.flushed = 0      # Records handed to the file (flusher)
+        self.dropped = 0
+
+        self.game = None
+        self.equation_start = 0   # Tick the current equation appeared on
+
+        self.file = None
+        self.file_index = 0
+        self.stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.flusher, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def record_step(self, engine, events, equation, level):
+        """Record the events of one engine step.
+
+        equation ((table, index)) and level are from before the step: a
+        solved equation is replaced and the level may go up within it.
+        """
+        if engine.seed != self.game:
+            self.game = engine.seed
+            self.equation_start = 0
+        for event in events:
+            written = self.written
+            if written - self.flushed >= self.capacity:
+                self.dropped += 1
+                continue
+            code = EVENT_CODES[event]
+            RECORD.pack_into(
+                self.buffer, (written % self.capacity) * RECORD.size,
+                time.time(), engine.seed,
+                engine.ticks, engine.ticks - self.equation_start, engine.time_remaining,
+                code, min(engine.level if code == LEVEL_UP else level, 255), max(0, engine.lives),
+                REASON_CODES.get(engine.game_over_reason, 0) if code == GAME_OVER else 0,
+                engine.eaten_egg.number if code == EGG or code == LIFE_LOST else 0,
+                min(engine.score, 65535), equation[0], equation[1])
+            self.written = written + 1   # Publish only once the record is complete
+            if code == SOLVED:
+                self.equation_start = engine.ticks
+
+    def flusher(self):
+        while not self.stop.wait(FLUSH_SECONDS):
+            self.flush()
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+
+    def flush(self):
+        """Append everything buffered to the current file (flusher thread)"""
+        end = self.written
+        start = self.flushed
+        if end == start:
+            return
+        if self.directory is None:
+            self.flushed = end
+            return
+        size = RECORD.size
+        first, last = start % self.capacity, end % self.capacity
+        if first < last:
+            data = self.buffer[first * size:last * size]
+        else:   # Wrapped round the end of the buffer
+            data = self.buffer[first * size:] + self.buffer[:last * size]
+        try:
+            self.output().write(data)
+            self.file.flush()
+        except OSError as e:
+            print(f"Telemetry write failed ({e})")
+        self.flushed = end
+
+    def output(self):
+        """Current file, rotating to a new one when it is full"""
+        if self.file is not None and self.file.tell() >= MAX_FILE_BYTES:
+            self.file.close()
+            self.file = None
+            self.file_index += 1
+        if self.file is None:
+            path = os.path.join(self.directory, f"events-{self.stamp}-{os.getpid()}-{self.file_index:03}.bin")
+            self.file = open(path, 'ab')
+            name = self.player.encode()[:255]
+            self.file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, BANK_VERSION, RECORD.size, len(name)) + name)
+            self.prune()
+        return self.file
+
+    def prune(self):
+        files = sorted(glob.glob(os.path.join(self.directory, "events-*.bin")), key=os.path.getmtime)
+        for path in files[:-KEEP_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self, timeout=5.0):
+        """Flush what is buffered and stop the flusher"""
+        self.stop.set()
+        self.thread.join(timeout)
+
+
+def read_events(path):
+    """(player, records) from one telemetry file; records are RECORD tuples"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, bank_version, size, name_length = FILE_HEADER.unpack_from(data, 0)
+    if magic != FILE_MAGIC or version != FILE_VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a telemetry file of this version")
+    if bank_version != BANK_VERSION:
+        raise ValueError(f"{path} was recorded with equation bank v{bank_version}")
+    start = FILE_HEADER.size + name_length
+    player = data[FILE_HEADER.size:start].decode(errors='replace')
+    end = start + (len(data) - start) // size * size   # Ignore a partly written last record
+    return player, list(RECORD.iter_unpack(data[start:end]))
+
+
+def report(paths):
+    bank = load_bank()
+    per_level = defaultdict(Counter)
+    equations = defaultdict(Counter)
+    solve_ticks = defaultdict(list)
+    reasons = Counter()
+    players = set()
+    for path in paths:
+        try:
+            player, records = read_events(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"skipping {path}: {e}")
+            continue
+        players.add(player)
+        for _, _, _, equation_ticks, _, code, level, _, reason, _, _, table, index in records:
+            per_level[level][code] += 1
+            equations[(table, index)][code] += 1
+            if code == SOLVED:
+                solve_ticks[level].append(equation_ticks)
+            elif code == GAME_OVER:
+                reasons[REASONS[reason]] += 1
+
+    print(f"Players: {', '.join(sorted(players)) or '-'}")
+    print(f"\n{'level':>5} {'solved':>7} {'lives lost':>11} {'game overs':>11} {'median ticks to solve':>22}")
+    for level in sorted(per_level):
+        counts = per_level[level]
+        ticks = sorted(solve_ticks[level])
+        median = ticks[len(ticks) // 2] if ticks else '-'
+        print(f"{level:>5} {counts[SOLVED]:>7} {counts[LIFE_LOST]:>11} {counts[GAME_OVER]:>11} {median:>22}")
+
+    print("\nHow games ended:")
+    for reason, count in reasons.most_common():
+        print(f"  {reason:<16} {count}")
+
+    failed = sorted(equations.items(), key=lambda item: -(item[1][LIFE_LOST] + item[1][GAME_OVER]))[:10]
+    print("\nEquations failed most (lives lost / game overs / solved):")
+    for (table, index), counts in failed:
+        if not counts[LIFE_LOST] + counts[GAME_OVER]:
+            break
+        text = bank.tables[table].equation(index)['equation']
+        print(f"  {text:<28} {counts[LIFE_LOST]:>4} / {counts[GAME_OVER]:>4} / {counts[SOLVED]:>4}")
+
+
+if __name__ == "__main__":
+    report(sys.argv[1:] or sorted(glob.glob(os.path.join(telemetry_dir(), "events-*.bin"))))
@@ -0,0 +1,83 @@
+"""
+Math Snake frame timing
+Fixed-timestep scheduler that runs logic ticks on the real clock, independent
+of how fast frames are rendered.
+"""
+
+import time
+
+
+class FixedTimestep:
+    """Accumulates real elapsed time and hands it out as whole logic ticks.
+
+    Each frame call begin_frame(), then run one logic tick for every True
+    returned by consume(step_seconds). If rendering falls behind, several
+    ticks run before the next frame is drawn (frame skipping), up to
+    max_ticks_per_frame; time beyond that is dropped so a long stall slows
+    the game down instead of fast-forwarding it.
+    """
+
+    def __init__(self, max_ticks_per_frame=5, max_frame_seconds=0.25, clock=time.perf_counter):
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.max_frame_seconds = max_frame_seconds
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last_time = None
+        self.frame_ticks = 0
+        self.tick_now = False   # Run a tick on the next consume(), see pause()
+
+        # Totals for reporting
+        self.frames = 0
+        self.ticks = 0
+        self.skipped_frames = 0
+        self.dropped_seconds = 0.0
+
+    def begin_frame(self):
+        """Add the real time elapsed since the previous frame"""
+        now = self.clock()
+        if self.last_time is not None:
+            elapsed = now - self.last_time
+            if elapsed > self.max_frame_seconds:
+                self.dropped_seconds += elapsed - self.max_frame_seconds
+                elapsed = self.max_frame_seconds
+            self.accumulator += elapsed
+        self.last_time = now
+        self.frame_ticks = 0
+        self.frames += 1
+
+    def consume(self, step_seconds):
+        """Take one tick of step_seconds from the accumulator if enough time has built up"""
+        if self.tick_now:
+            self.tick_now = False
+            self.frame_ticks += 1
+            self.ticks += 1
+            return True
+        if self.accumulator < step_seconds:
+            return False
+        if self.frame_ticks >= self.max_ticks_per_frame:
+            # Too far behind: drop whole ticks but keep the partial remainder
+            dropped = self.accumulator - self.accumulator % step_seconds
+            self.dropped_seconds += dropped
+            self.accumulator -= dropped
+            return False
+
+        self.accumulator -= step_seconds
+        self.frame_ticks += 1
+        self.ticks += 1
+        if self.frame_ticks > 1:
+            self.skipped_frames += 1
+        return True
+
+    def alpha(self, step_seconds):
+        """How far (0 to 1) the clock is between the last tick and the next, for interpolation"""
+        return min(1.0, self.accumulator / step_seconds)
+
+    def pause(self):
+        """Stop counting real time until the next begin_frame(), e.g. while the game waits idle.
+
+        The first consume() afterwards ticks at once, so whatever ended the
+        pause (usually a key press) takes effect without waiting a whole tick.
+        """
+        self.accumulator = 0.0
+        self.last_time = None
+        self.tick_now = True
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Math Snake difficulty tuner
+Monte Carlo sweep over difficulty knobs: plays many headless games with a
+scripted agent on a process pool and tabulates survival time, level reached
+and how games ended for every parameter set.
+
+    python snake_tuner.py --games 2000 --grid time_base=35,45,55 decoys_base=4,6,8
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from snake_autoplay import PathAgent
+from snake_engine import SnakeEngine, Difficulty, DIRECTIONS
+
+# Games per work unit: small enough to spread across cores, big enough that
+# process overhead stays negligible
+CHUNK_GAMES = 50
+
+# Games still running after this many simulated seconds are stopped and counted as such
+MAX_GAME_SECONDS = 1800
+TIMED_OUT = "Still alive"
+# Games whose agent never starts the snake moving are stopped at once and counted apart
+NEVER_MOVED = "Never moved"
+
+
+class RandomAgent:
+    """Random moves that avoid walls and the snake's own body when it can"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def safe_moves(self, engine):
+        head_x, head_y = engine.snake[0]
+        moves = []
+        for direction in DIRECTIONS:
+            if direction == (-engine.direction[0], -engine.direction[1]):
+                continue
+            x, y = head_x + direction[0], head_y + direction[1]
+            if 0 <= x < engine.width and 0 <= y < engine.height and not engine.occupied[y * engine.width + x]:
+                moves.append((direction, (x, y)))
+        return moves
+
+    def act(self, engine):
+        moves = self.safe_moves(engine)
+        if not moves:
+            return None
+        return self.rng.choice(moves)[0]
+
+
+class GreedyAgent(RandomAgent):
+    """Heads for the nearest number of the equation, steering round decoys.
+
+    With mistake_rate it sometimes picks the nearest decoy instead, standing
+    in for a player who gets the sum wrong.
+    """
+
+    def __init__(self, rng, mistake_rate=0.0):
+        super().__init__(rng)
+        self.mistake_rate = mistake_rate
+        self.goal = None
+
+    def choose_goal(self, engine):
+        head_x, head_y = engine.snake[0]
+        want_target = self.rng.random() >= self.mistake_rate
+        best = None
+        for pos, egg in engine.egg_at.items():
+            if egg.is_target != want_target:
+                continue
+            distance = abs(pos[0] - head_x) + abs(pos[1] - head_y)
+            if best is None or distance < best[0]:
+                best = (distance, pos)
+        return best[1] if best else None
+
+    def act(self, engine):
+        if self.goal not in engine.egg_at:
+            self.goal = self.choose_goal(engine)
+        moves = self.safe_moves(engine)
+        if not moves:
+            return None
+        if self.goal is None:
+            return self.rng.choice(moves)[0]
+
+        def cost(move):
+            direction, (x, y) = move
+            egg = engine.egg_at.get((x, y))
+            detour = 1000 if egg is not None and (x, y) != self.goal else 0
+            return detour + abs(self.goal[0] - x) + abs(self.goal[1] - y), self.rng.random()
+
+        return min(moves, key=cost)[0]
+
+
+AGENTS = {
+    'random': RandomAgent,
+    'greedy': GreedyAgent,
+    'path': PathAgent,
+}
+
+
+def make_agent(spec, rng):
+    """Agent from a spec like 'greedy' or 'greedy:0.1' (name, then constructor arguments)"""
+    name, _, args = spec.partition(':')
+    params = [float(value) for value in args.split(',')] if args else []
+    return AGENTS[name](rng, *params)
+
+
+def play_chunk(task):
+    """Play a chunk of games for one parameter set; returns summed statistics"""
+    params, agent_spec, seed, games = task
+    rng = random.Random(seed)
+    engine = SnakeEngine(seed=seed, difficulty=Difficulty(**params))
+    survival = []
+    levels = Counter()
+    reasons = Counter()
+    ticks = 0
+
+    for _ in range(games):
+        engine.reset_game()
+        agent = make_agent(agent_spec, rng)
+        seconds = 0.0
+        stuck = False
+        while not engine.game_over and seconds < MAX_GAME_SECONDS:
+            seconds += engine.tick_seconds()
+            engine.step(agent.act(engine))
+            # A stuck agent never starts moving; stop rather than spin to the time cap
+            if engine.direction == (0, 0):
+                stuck = True
+                break
+        ticks += engine.ticks
+        survival.append(seconds)
+        levels[engine.level] += 1
+        reasons[NEVER_MOVED if stuck else engine.game_over_reason or TIMED_OUT] += 1
+
+    return {'survival': survival, 'levels': levels, 'reasons': reasons, 'ticks': ticks}
+
+
+def parse_grid(items):
+    """['time_base=35,45', 'decoys_base=4,6'] -> list of parameter dicts (cartesian product)"""
+    defaults = Difficulty().as_dict()
+    names, values = [], []
+    for item in items:
+        name, _, options = item.partition('=')
+        if name not in defaults:
+            raise SystemExit(f"unknown knob {name!r}; choose from {', '.join(defaults)}")
+        names.append(name)
+        values.append([type(defaults[name])(option) for option in options.split(',')])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(params, result):
+    """One tuning table row"""
+    survival = sorted(result['survival'])
+    games = len(survival)
+    row = dict(params)
+    row['games'] = games
+    row['survival_mean_s'] = round(sum(survival) / games, 2)
+    row['survival_p50_s'] = round(percentile(survival, 0.5), 2)
+    row['survival_p90_s'] = round(percentile(survival, 0.9), 2)
+    row['level_mean'] = round(sum(level * n for level, n in result['levels'].items()) / games, 3)
+    row['level_max'] = max(result['levels'])
+    for reason, n in sorted(result['reasons'].items()):
+        row[f"ended: {reason}"] = round(n / games, 3)
+    return row
+
+
+def run_sweep(grid, agent, games, workers, seed=0):
+    """Play `games` games per parameter set; returns (rows, total ticks).
+
+    Seeds depend only on the set and chunk numbers, so results do not change
+    with the number of workers.
+    """
+    tasks = []
+    owners = []
+    for set_index, params in enumerate(grid):
+        for chunk, start in enumerate(range(0, games, CHUNK_GAMES)):
+            chunk_seed = random.Random(f"{seed}/{set_index}/{chunk}").getrandbits(32)
+            tasks.append((params, agent, chunk_seed, min(CHUNK_GAMES, games - start)))
+            owners.append(set_index)
+
+    merged = [{'survival': [], 'levels': Counter(), 'reasons': Counter(), 'ticks': 0} for _ in grid]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for set_index, result in zip(owners, pool.map(play_chunk, tasks, chunksize=1)):
+            total = merged[set_index]
+            total['survival'].extend(result['survival'])
+            total['levels'].update(result['levels'])
+            total['reasons'].update(result['reasons'])
+            total['ticks'] += result['ticks']
+
+    rows = [summarize(params, result) for params, result in zip(grid, merged)]
+    return rows, sum(result['ticks'] for result in merged)
+
+
+def print_table(rows):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    widths = [max(len(column), *(len(str(row.get(column, ''))) for row in rows)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(row.get(column, '')).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Snake difficulty tuner")
+    parser.add_argument("--grid", nargs="*", default=[], metavar="KNOB=V1,V2",
+                        help=f"knob values to sweep: {', '.join(Difficulty().as_dict())}")
+    parser.add_argument("--agent", default="greedy:0.05",
+                        help=f"scripted player, NAME[:ARGS] with NAME one of {', '.join(AGENTS)} (default greedy:0.05)")
+    parser.add_argument("--games", type=int, default=500, help="games per parameter set")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write the table as JSON")
+    parser.add_argument("--csv", metavar="PATH", help="write the table as CSV")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid)
+    start = time.perf_counter()
+    rows, ticks = run_sweep(grid, args.agent, args.games, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_table(rows)
+    print(f"{len(grid) * args.games} games, {ticks:,} ticks in {elapsed:.1f}s on {args.workers} workers "
+          f"({ticks / elapsed:,.0f} ticks/s)", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'agent': args.agent, 'games': args.games, 'seed': args.seed, 'rows': rows}, f, indent=2)
+    if args.csv:
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()